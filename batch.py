@@ -0,0 +1,66 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+from veriFHIR.ig.report import ReportIndex
+from main import add_review_arguments, setup_llm, print_llm_stats, review
+
+
+def list_igs(inputs: List[str]) -> List[Path]:
+    files: List[Path] = []
+    for input in inputs:
+        path: Path = Path(input)
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.zip")))
+        elif path.is_file():
+            files.append(path)
+        else:
+            raise Exception(f"{input} is neither a directory nor a file.")
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(description="veriFHIR batch review", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--input", type=str, nargs="+", required=True, help="Full IG ZIP files or directories containing them (type: str)")
+    parser.add_argument("--output", type=str, required=True, help="Output path, one sub-directory per IG (type: str)")
+    parser.add_argument("--jobs", type=int, default=2, help="Number of IGs reviewed concurrently (type: int)")
+    parser.add_argument("--manifest-dir", type=str, default=None, help="Directory where the run manifest of each IG is written (type: str)")
+    parser.add_argument("--baseline-dir", type=str, default=None, help="Directory of the manifests of a previous batch run, reused for unchanged pages and artifacts (type: str)")
+    add_review_arguments(parser)
+    args = parser.parse_args()
+
+    files: List[Path] = list_igs(args.input)
+    if len({file.stem for file in files}) != len(files):
+        raise Exception("IG files must have distinct names.")
+    print(f"Starting the review of {len(files)} IG(s)")
+    print("...")
+    clients, scheduler, cache = setup_llm(args)
+    index: ReportIndex = ReportIndex()
+
+    def review_file(file: Path):
+        manifest_path: Optional[Path] = Path(args.manifest_dir, f"{file.stem}.json") if args.manifest_dir else None
+        baseline_path: Optional[Path] = Path(args.baseline_dir, f"{file.stem}.json") if args.baseline_dir else None
+        if baseline_path and not baseline_path.is_file():
+            baseline_path = None
+        try:
+            metadata, report, output_files = review(args, file, Path(args.output, file.stem), manifest_path, baseline_path)
+        except Exception as e:
+            print(f"{file.name}: review failed ({e})")
+            index.add_error(file, str(e))
+            return
+        print(f"{file.name}: report saved at {', '.join(str(output_file) for output_file in output_files.values())}")
+        index.add_report(file, metadata, report, output_files.get("html", next(iter(output_files.values()))))
+
+    with ThreadPoolExecutor(max(1, args.jobs)) as executor:
+        list(executor.map(review_file, files))
+
+    print_llm_stats(scheduler, cache)
+    clients.close()
+    if cache is not None:
+        cache.close()
+    print(f"Index saved at: {index.write(Path(args.output))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from veriFHIR import FHIRIG
+from veriFHIR.ig.page_parsers import PARSERS, ParsedPage
+from main import add_review_arguments, setup_llm, review
+
+
+def benchmark_parsers(ig: FHIRIG, repeat: int) -> Dict[str, Dict]:
+    pages_contents: List[str] = [ig.get_fs().read_text(ig.get_toc_path(), "utf8")]
+    pages_contents.extend(ig.get_fs().read_text(page.get_path(), "utf8") for page in ig.get_pages() if page.get_path() != ig.get_toc_path())
+    reference: List[ParsedPage] = [PARSERS["html.parser"](contents) for contents in pages_contents]
+    results: Dict[str, Dict] = {}
+    for name, parse in PARSERS.items():
+        durations: List[float] = []
+        parsed: List[ParsedPage] = []
+        for _ in range(repeat):
+            start: float = time.perf_counter()
+            parsed = [parse(contents) for contents in pages_contents]
+            durations.append(time.perf_counter() - start)
+        results[name] = {
+            "best": min(durations),
+            "mean": sum(durations) / len(durations),
+            "identical": parsed == reference
+        }
+    return results
+
+
+def benchmark_pipeline(args: argparse.Namespace, file: Path) -> Dict[int, Dict]:
+    args.no_cache = True
+    args.llm_batch = None
+    reference: Optional[List[Tuple]] = None
+    results: Dict[int, Dict] = {}
+    for concurrency in args.concurrency:
+        args.llm_concurrency = concurrency
+        clients, scheduler, _ = setup_llm(args)
+        with tempfile.TemporaryDirectory() as output:
+            start: float = time.perf_counter()
+            _, report, _ = review(args, file, Path(output))
+            duration: float = time.perf_counter() - start
+        clients.close()
+        checks: List[Tuple] = [(c.get_name(), c.get_value(), c.get_proof(), c.get_domain()) for c in report.get_checks()]
+        if reference is None:
+            reference = checks
+        results[concurrency] = {
+            "duration": duration,
+            "requests": scheduler.get_request_count(),
+            "failures": scheduler.get_failure_count(),
+            "checks": len(checks),
+            "identical": checks == reference
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="veriFHIR benchmarks", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    parsers_parser = subparsers.add_parser("parsers", help="Compare HTML parser backends on the pages of an IG", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parsers_parser.add_argument("--file", type=str, required=True, help="Full IG ZIP file path (type: str)")
+    parsers_parser.add_argument("--repeat", type=int, default=5, help="Number of runs per backend (type: int)")
+    pipeline_parser = subparsers.add_parser("pipeline", help="Measure the end-to-end throughput of the checker pipeline, offline with --llm-backend replay", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    pipeline_parser.add_argument("--file", type=str, required=True, help="Full IG ZIP file path (type: str)")
+    pipeline_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Values of --llm-concurrency to compare (type: int)")
+    add_review_arguments(pipeline_parser)
+    args = parser.parse_args()
+
+    if args.benchmark == "parsers":
+        ig = FHIRIG(Path(args.file))
+        total_size: int = sum(len(page.get_text()) for page in ig.get_pages())
+        print(f"{ig.get_metadata().get_name()}#{ig.get_metadata().get_version()}: {len(ig.get_pages())} pages ({total_size} characters of text)")
+        results: Dict[str, Dict] = benchmark_parsers(ig, args.repeat)
+        baseline: float = results["html.parser"]["best"]
+        for name, result in results.items():
+            print(f"{name:<12} best {result['best'] * 1000:9.1f} ms  mean {result['mean'] * 1000:9.1f} ms  speedup x{baseline / result['best']:.2f}  identical output: {result['identical']}")
+        ig.close()
+    elif args.benchmark == "pipeline":
+        results = benchmark_pipeline(args, Path(args.file))
+        baseline = results[args.concurrency[0]]["duration"]
+        for concurrency, result in results.items():
+            print(f"concurrency {concurrency:<4} {result['duration']:9.2f} s  {result['requests']} requests ({result['failures']} failed)  {result['requests'] / result['duration']:7.1f} requests/s  speedup x{baseline / result['duration']:.2f}  identical output: {result['identical']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+from pathlib import Path
+from typing import Dict, Optional
+import sys
+
+from veriFHIR.ig.report import Check, Proof
+from veriFHIR.ig.report_diff import DIFF_STATUSES, CheckDiff, ReportDiff, load_run
+
+
+def format_value(check: Optional[Check]) -> str:
+    if check is None:
+        return "absent"
+    return "✅" if check.get_value() else "❌" if check.get_value() == False else "-"
+
+
+def print_diff(diff: CheckDiff):
+    print(f"[{diff.get_status()}] {diff.get_domain()} / {diff.get_name()}: {format_value(diff.get_old())} -> {format_value(diff.get_new())}")
+    for item in diff.get_added_items():
+        print(f"  + {Proof.item_to_dict(item)}")
+    for item in diff.get_removed_items():
+        print(f"  - {Proof.item_to_dict(item)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="veriFHIR report diff", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument("--old", type=str, required=True, help="Previous run: JSONL or SARIF report, or run manifest (type: str)")
+    parser.add_argument("--new", type=str, required=True, help="Current run: JSONL or SARIF report, or run manifest (type: str)")
+    parser.add_argument("--output", type=str, default=None, help="Path of the JSON diff to write (type: str)")
+    parser.add_argument("--show", type=str, nargs="+", default=["regression", "improvement", "changed", "added", "removed"], choices=DIFF_STATUSES, help="Statuses of the checks listed in the console (type: str)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 when at least one check regressed")
+    args = parser.parse_args()
+
+    old_ig, old_checks = load_run(Path(args.old))
+    new_ig, new_checks = load_run(Path(args.new))
+    report_diff: ReportDiff = ReportDiff(old_checks, new_checks)
+    for diff in report_diff.get_diffs():
+        if diff.get_status() in args.show:
+            print_diff(diff)
+    counts: Dict[str, int] = report_diff.count_statuses()
+    print(", ".join(f"{count} {status}" for status, count in counts.items()))
+    if args.output:
+        print(f"Diff saved at: {report_diff.write(Path(args.output), old_ig, new_ig)}")
+    if args.fail_on_regression and report_diff.has_regressions():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
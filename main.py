@@ -1,36 +1,154 @@
 import argparse
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
 
 from veriFHIR import FHIRIG
 from veriFHIR import CheckerManager
+from veriFHIR.checkers.manifest import RunManifest
+from veriFHIR.ig.fhir_ig import Metadata
+from veriFHIR.ig.report import Report, REPORT_FORMATS
 from veriFHIR import PageTypeChecker, AllPagesChecker, TextChecker, ArtifactsChecker, RefsChecker, AmbiguousWordingChecker
-from veriFHIR.utils.utils import extract_zip
+from veriFHIR.ig.page_parsers import PARSERS
+from veriFHIR.llm.cache import ResponseCache, set_response_cache, get_response_cache
+from veriFHIR.llm.batch import BatchCollector, BatchRunner, OpenAIBatchClient, LocalBatchClient
+from veriFHIR.llm.scheduler import RequestScheduler, set_scheduler
+from veriFHIR.llm.clients import ClientRegistry, set_client_registry, load_environment
+from veriFHIR.llm.backends import LLMBackend, OpenAIBackend, LocalBackend, ReplayBackend, RecordingBackend, set_backend
+
+
+BATCH_CLIENTS: dict = {
+    "openai": OpenAIBatchClient,
+    "local": LocalBatchClient
+}
+
+
+def add_review_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--model", type=str, default="gpt-4o-mini", help="OpenAI model name (type: str)")
+    parser.add_argument("--check-format", action="store_true", help="Check artifacts naming rules according to https://ansforge.github.io/IG-documentation/main/ig/mod_bonnes_pratiques.html#r%C3%A8gles-de-nommage-des-ressources-de-conformit%C3%A9")
+    parser.add_argument("--check-clarity", action="store_true", help="Check ambiguous wording")
+    parser.add_argument("--formats", type=str, nargs="+", default=["html"], choices=REPORT_FORMATS, help="Report formats written to the output folder (type: str)")
+    parser.add_argument("--artifact-cache-size", type=int, default=None, help="Maximum number of parsed artifacts kept in memory, unbounded if not set (type: int)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of workers used to load pages and artifacts in parallel, sequential loading if not set (type: int)")
+    parser.add_argument("--probe-artifacts", action="store_true", help="Discover artifacts by reading only the leading top-level JSON keys of each file, deferring full parsing until a check needs the content")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="Maximum number of concurrent LLM requests per checker (type: int)")
+    parser.add_argument("--html-parser", type=str, default="html.parser", choices=list(PARSERS), help="Backend used to extract text and links from pages (type: str)")
+    parser.add_argument("--cache-dir", type=str, default=str(Path(Path.home(), ".cache", "veriFHIR")), help="Directory of the persistent LLM response cache (type: str)")
+    parser.add_argument("--cache-ttl", type=float, default=30, help="Number of days a cached LLM response stays valid (type: float)")
+    parser.add_argument("--cache-max-size", type=int, default=512, help="Maximum size of the cached LLM responses in MB, least recently used responses are evicted first (type: int)")
+    parser.add_argument("--no-cache", action="store_true", help="Always query the LLM, without reading or writing the response cache")
+    parser.add_argument("--max-page-tokens", type=int, default=None, help="Maximum number of page tokens sent in a single LLM request, longer pages are split into overlapping windows, whole pages if not set (type: int)")
+    parser.add_argument("--chunk-overlap", type=int, default=200, help="Number of tokens shared by consecutive windows of a split page (type: int)")
+    parser.add_argument("--max-element-tokens", type=int, default=2000, help="Maximum number of tokens of the element list sent with a page in a single text check request, larger lists are split across requests (type: int)")
+    parser.add_argument("--combined-pass", action="store_true", help="Send each page once to the LLM with the tasks of all page checkers combined in a single structured request")
+    parser.add_argument("--checker-workers", type=int, default=None, help="Number of checkers run concurrently, sequential checks if not set (type: int)")
+    parser.add_argument("--checker-processes", action="store_true", help="Run checkers declared CPU-bound in worker processes instead of threads when --checker-workers is set")
+    parser.add_argument("--llm-rpm", type=float, default=None, help="Maximum number of LLM requests per minute, unlimited if not set (type: float)")
+    parser.add_argument("--llm-tpm", type=float, default=None, help="Maximum number of LLM tokens per minute, unlimited if not set (type: float)")
+    parser.add_argument("--llm-max-retries", type=int, default=5, help="Maximum number of retries of a rate limited or failed LLM request (type: int)")
+    parser.add_argument("--llm-batch", type=str, default=None, choices=list(BATCH_CLIENTS), help="Send the LLM requests as asynchronous batches instead of individual calls: openai (Batch API) or local (runs the batch file through the configured --llm-backend) (type: str)")
+    parser.add_argument("--batch-dir", type=str, default=None, help="Directory of the batch input, state and output files, <cache-dir>/batches if not set (type: str)")
+    parser.add_argument("--batch-poll-interval", type=float, default=60, help="Number of seconds between two polls of a submitted batch (type: float)")
+    parser.add_argument("--llm-max-in-flight", type=int, default=None, help="Maximum number of LLM requests in flight at the same time across all checkers, unlimited if not set (type: int)")
+    parser.add_argument("--llm-backend", type=str, default="openai", choices=["openai", "local", "replay"], help="LLM backend: openai (OpenAI API), local (OpenAI-compatible server such as llama.cpp or vLLM) or replay (responses stored in --llm-recording, no network) (type: str)")
+    parser.add_argument("--llm-base-url", type=str, default="http://localhost:8000/v1", help="Base URL of the OpenAI-compatible server of the local backend (type: str)")
+    parser.add_argument("--llm-recording", type=str, default=None, help="JSONL file of recorded LLM responses, written by the openai and local backends and read by the replay backend (type: str)")
+    parser.add_argument("--llm-latency", type=float, default=0, help="Synthetic latency in seconds added to each response of the replay backend (type: float)")
+    parser.add_argument("--llm-latency-jitter", type=float, default=0, help="Maximum deterministic variation in seconds of the synthetic latency of the replay backend (type: float)")
+    parser.add_argument("--http-max-connections", type=int, default=100, help="Maximum number of open connections of the shared LLM HTTP client (type: int)")
+    parser.add_argument("--http-max-keepalive", type=int, default=20, help="Maximum number of idle connections kept alive by the shared LLM HTTP client (type: int)")
+    parser.add_argument("--http2", action="store_true", help="Use HTTP/2 for LLM requests, requires the h2 package")
+
+
+def setup_backend(args: argparse.Namespace, clients: ClientRegistry) -> Optional[LLMBackend]:
+    backend: Optional[LLMBackend] = None
+    if args.llm_backend == "replay":
+        if not args.llm_recording:
+            raise Exception("The replay backend requires --llm-recording.")
+        return ReplayBackend(Path(args.llm_recording), latency=args.llm_latency, jitter=args.llm_latency_jitter)
+    if args.llm_backend == "local":
+        backend = LocalBackend(args.llm_base_url, api_key=os.getenv("OPENAI_API_KEY"), clients=clients)
+    if args.llm_recording:
+        backend = RecordingBackend(backend or OpenAIBackend(os.getenv("OPENAI_API_KEY", ""), clients=clients), Path(args.llm_recording))
+    return backend
+
+
+def setup_llm(args: argparse.Namespace) -> Tuple[ClientRegistry, RequestScheduler, Optional[ResponseCache]]:
+    load_environment()
+    clients = ClientRegistry(max_connections=args.http_max_connections, max_keepalive_connections=args.http_max_keepalive, http2=args.http2)
+    set_client_registry(clients)
+    set_backend(setup_backend(args, clients))
+    scheduler = RequestScheduler(requests_per_minute=args.llm_rpm, tokens_per_minute=args.llm_tpm, max_retries=args.llm_max_retries, max_in_flight=args.llm_max_in_flight)
+    set_scheduler(scheduler)
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(Path(args.cache_dir), ttl=args.cache_ttl * 86400, max_size=args.cache_max_size * 1024 * 1024)
+        set_response_cache(cache)
+    elif args.llm_batch:
+        raise Exception("Batch mode stores the batch results in the response cache and cannot be used with --no-cache.")
+    return clients, scheduler, cache
+
+
+def print_llm_stats(scheduler: RequestScheduler, cache: Optional[ResponseCache]):
+    print(f"LLM requests: {scheduler.get_request_count()} sent, {scheduler.get_retry_count()} retries, {scheduler.get_failure_count()} failures, {scheduler.get_throttle_wait():.1f}s throttled")
+    if cache is not None:
+        print(f"LLM cache: {cache.get_hits()} hits, {cache.get_misses()} misses")
+
+
+def review(args: argparse.Namespace, file: Path, output: Path, manifest_path: Optional[Path] = None, baseline_path: Optional[Path] = None) -> Tuple[Metadata, Report, Dict[str, Path]]:
+    ig = FHIRIG(file, cache_size=args.artifact_cache_size, workers=args.workers, probe_artifacts=args.probe_artifacts, parser=args.html_parser)
+    try:
+        manifest = None
+        if manifest_path or baseline_path:
+            manifest = RunManifest(ig, RunManifest.load(baseline_path) if baseline_path else None)
+        collector = BatchCollector() if args.llm_batch else None
+        manager = CheckerManager(combined=args.combined_pass, workers=args.checker_workers, processes=args.checker_processes, manifest=manifest, batch_collector=collector)
+        manager.register(PageTypeChecker(ig, args.model, concurrency=args.llm_concurrency, max_page_tokens=args.max_page_tokens, chunk_overlap=args.chunk_overlap))
+        manager.register(RefsChecker(ig))
+        manager.register(AllPagesChecker(ig, args.model, concurrency=args.llm_concurrency, max_page_tokens=args.max_page_tokens, chunk_overlap=args.chunk_overlap))
+        manager.register(TextChecker(ig, args.model, concurrency=args.llm_concurrency, max_page_tokens=args.max_page_tokens, chunk_overlap=args.chunk_overlap, max_element_tokens=args.max_element_tokens))
+        if args.check_clarity:
+            manager.register(AmbiguousWordingChecker(ig, args.model, concurrency=args.llm_concurrency, max_page_tokens=args.max_page_tokens, chunk_overlap=args.chunk_overlap))
+        manager.register(ArtifactsChecker(ig, check_format=args.check_format))
+        report = manager.check()
+        if collector is not None:
+            batch_dir = Path(args.batch_dir) if args.batch_dir else Path(args.cache_dir, "batches")
+            runner = BatchRunner(BATCH_CLIENTS[args.llm_batch](os.getenv("OPENAI_API_KEY")), batch_dir, get_response_cache(), args.batch_poll_interval) #type: ignore
+            while collector.get_requests():
+                print(f"Batch: {len(collector.get_requests())} LLM requests collected")
+                print(f"Batch: {runner.run(collector)} responses received")
+                collector.clear()
+                report = manager.check()
+        output_files = report.write_formats(output, ig.get_metadata(), args.formats)
+        if manifest is not None:
+            if baseline_path:
+                print(f"Baseline: {manifest.get_reused()} results reused, {manifest.get_evaluated()} re-evaluated")
+            if manifest_path:
+                print(f"Manifest saved at: {manifest.write(manifest_path)}")
+    finally:
+        ig.close()
+    return ig.get_metadata(), report, output_files
 
 
 def main():
     parser = argparse.ArgumentParser(description="veriFHIR project tools", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument("--file", type=str, required=True, help="Full IG ZIP file path (type: str)")
     parser.add_argument("--output", type=str, required=True, help="Output path (type: str)")
-    parser.add_argument("--model", type=str, default="gpt-4o-mini", help="OpenAI model name (type: str)")
-    parser.add_argument("--check-format", action="store_true", help="Check artifacts naming rules according to https://ansforge.github.io/IG-documentation/main/ig/mod_bonnes_pratiques.html#r%C3%A8gles-de-nommage-des-ressources-de-conformit%C3%A9")
-    parser.add_argument("--check-clarity", action="store_true", help="Check ambiguous wording")
+    parser.add_argument("--manifest", type=str, default=None, help="Path of the run manifest to write, with the hash of each page and artifact and the results keyed by those hashes (type: str)")
+    parser.add_argument("--baseline", type=str, default=None, help="Manifest of a previous run whose results are reused for unchanged pages and artifacts (type: str)")
+    add_review_arguments(parser)
     args = parser.parse_args()
 
     print("Starting the review")
     print("...")
-    ig_dir, ig_path = extract_zip(args.file)
-    ig = FHIRIG(ig_path)
-    manager = CheckerManager()
-    manager.register(PageTypeChecker(ig, args.model))
-    manager.register(RefsChecker(ig))
-    manager.register(AllPagesChecker(ig, args.model))
-    manager.register(TextChecker(ig, args.model))
-    if args.check_clarity:
-        manager.register(AmbiguousWordingChecker(ig, args.model))
-    manager.register(ArtifactsChecker(ig, check_format=args.check_format))
-    report = manager.check()
-    output_file = report.write(args.output, ig.get_metadata())
-    ig_dir.cleanup()
-    print(f"Repport saved at: {output_file}")
+    clients, scheduler, cache = setup_llm(args)
+    _, _, output_files = review(args, Path(args.file), Path(args.output), Path(args.manifest) if args.manifest else None, Path(args.baseline) if args.baseline else None)
+    print_llm_stats(scheduler, cache)
+    clients.close()
+    if cache is not None:
+        cache.close()
+    for output_file in output_files.values():
+        print(f"Repport saved at: {output_file}")
 
 
 if __name__ == "__main__":
@@ -1,63 +1,35 @@
 import argparse
-import csv
 from pathlib import Path
+from typing import Dict
 
-from veriFHIR.utils.utils import extract_zip
 from veriFHIR.ig.fhir_ig import FHIRIG
+from veriFHIR.ig.obligations import OBLIGATION_FORMATS, OBLIGATION_URL, write_obligations
 
 
-def get_obligations(ig, output_path, obligation_url = "http://hl7.org/fhir/StructureDefinition/obligation"):
-    profiles = [artifact for artifact in ig.get_artifacts_type("StructureDefinition") if artifact.get_content().get("kind") == "resource"]
-    obligations = []
-
-    for profile in profiles:
-        content = profile.get_content()
-        elements = content.get("snapshot", {}).get("element", [])
-        for element in elements:
-            for ext in element.get("extension", []):
-                if ext.get("url")  != obligation_url:
-                    continue
-                obligation_data = {
-                    "profile": profile.get_id(),
-                    "path": element.get("path"), 
-                    "slice": element.get("sliceName"),
-                    "code": None, 
-                    "actor": None,
-                }
-                details = {}
-                for sub_ext in ext.get("extension", []):
-                    url = sub_ext.get("url")
-                    value = next(
-                        (v for k, v in sub_ext.items() if k.startswith("value")),
-                        None
-                    )
-                    details[url] = value
-                obligation_data["code"] = details.get("code")
-                obligation_data["actor"] = details.get("actor").split("/")[-1] #type: ignore
-                obligations.append(obligation_data)
-
-    output_file = Path(output_path, f"obligations_{ig.get_metadata().get_name()}.csv")
-    fieldnames = ["profile", "path", "slice", "code", "actor"]
-    with open(output_file, mode="w", newline="", encoding="utf-8-sig") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=";")
-        writer.writeheader()
-        writer.writerows(obligations)
-    return output_file
+def get_obligations(ig, output_path, obligation_url = OBLIGATION_URL, workers = None):
+    return write_obligations(ig, Path(output_path), ["csv"], obligation_url=obligation_url, workers=workers)["csv"]
 
 
 def main():
     parser = argparse.ArgumentParser(description="obligations extraction", formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     parser.add_argument("--file", type=str, required=True, help="Full IG ZIP file path (type: str)")
     parser.add_argument("--output", type=str, required=True, help="Output path (type: str)")
+    parser.add_argument("--formats", type=str, nargs="+", default=["csv"], choices=OBLIGATION_FORMATS, help="Output formats: csv, sqlite (database indexed on actor and code, shared by all IGs) or parquet (requires pyarrow) (type: str)")
+    parser.add_argument("--database", type=str, default=None, help="SQLite database of the sqlite format, <output>/obligations.db if not set (type: str)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes parsing the profiles, sequential parsing if not set (type: int)")
+    parser.add_argument("--probe-artifacts", action="store_true", help="Discover artifacts by reading only the leading top-level JSON keys of each file instead of parsing every file")
     args = parser.parse_args()
 
-    ig_dir, ig_path = extract_zip(args.file)
-    ig = FHIRIG(ig_path)
-    output_file = get_obligations(ig, args.output)
-    print(f"File saved at: {output_file}")
+    ig = FHIRIG(Path(args.file), workers=args.workers, probe_artifacts=args.probe_artifacts)
+    try:
+        output_files: Dict[str, Path] = write_obligations(ig, Path(args.output), args.formats, Path(args.database) if args.database else None, workers=args.workers)
+    finally:
+        ig.close()
+    for output_file in output_files.values():
+        print(f"File saved at: {output_file}")
 
 
 if __name__ == "__main__":
     main()
 
-# python obligations.py --file "./test/eps.zip" --output "./test"
\ No newline at end of file
+# python obligations.py --file "./test/eps.zip" --output "./test"
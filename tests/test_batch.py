@@ -0,0 +1,155 @@
+import json
+import re
+from pathlib import Path
+
+from openai.types.chat import ChatCompletion
+
+import veriFHIR.llm.backends as backends
+import veriFHIR.llm.cache as cache_module
+from veriFHIR.checkers.checker_manager import CheckerManager
+from veriFHIR.checkers.checkers import PageTypeChecker, RefsChecker
+from veriFHIR.ig.fhir_ig import FHIRIG
+from veriFHIR.llm.backends import LLMBackend
+from veriFHIR.llm.batch import BatchCollector, BatchRunner, LocalBatchClient
+from veriFHIR.llm.cache import ResponseCache
+from veriFHIR.llm.scheduler import RequestScheduler
+
+
+PAGE_TYPES = {"index.html": "index", "toc.html": "toc", "guidance.html": "None"}
+
+
+def answer(body: dict) -> str:
+    name = re.search(r"Page name: (\S+)", body["messages"][1]["content"]).group(1)
+    return PAGE_TYPES[name]
+
+
+def completion(body: dict) -> dict:
+    return {"id": "x", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": answer(body)}}]}
+
+
+class FakeBatchClient:
+    def __init__(self, failed: set = set()):
+        self.submitted = []
+        self._failed = failed
+        self._outputs = {}
+
+    def submit(self, input_path: Path) -> str:
+        lines = []
+        for line in input_path.read_text(encoding="utf-8").splitlines():
+            request = json.loads(line)
+            name = re.search(r"Page name: (\S+)", request["body"]["messages"][1]["content"]).group(1)
+            if name in self._failed:
+                lines.append(json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 500, "body": {}}, "error": None}))
+            else:
+                lines.append(json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": completion(request["body"])}, "error": None}))
+        batch_id = f"batch_{len(self.submitted)}"
+        self.submitted.append(batch_id)
+        self._outputs[batch_id] = "\n".join(lines)
+        return batch_id
+
+    def poll(self, batch_id: str):
+        return "completed", self._outputs[batch_id]
+
+
+class FakeBackend(LLMBackend):
+    def __init__(self):
+        self.calls = 0
+
+    def requires_api_key(self) -> bool:
+        return False
+
+    def create(self, model, messages, seed, response_format) -> ChatCompletion:
+        self.calls += 1
+        return ChatCompletion.model_validate(completion({"model": model, "messages": messages}))
+
+
+def make_ig(path: Path) -> Path:
+    site = path / "ig" / "site"
+    site.mkdir(parents=True, exist_ok=True)
+    (site / "package.manifest.json").write_text(json.dumps({"fhirVersion": ["4.0.1"], "name": "test.ig", "version": "1.0.0"}), encoding="utf-8")
+    (site / "index.html").write_text("<p>Home, see the <a href=\"qa.html\">QA</a></p>", encoding="utf-8")
+    (site / "toc.html").write_text("<a href=\"index.html\">Home</a><a href=\"guidance.html\">Guidance</a>", encoding="utf-8")
+    (site / "guidance.html").write_text("<p>Guidance</p>", encoding="utf-8")
+    return path / "ig"
+
+
+def run_review(tmp_path: Path, monkeypatch, client, backend: LLMBackend):
+    cache = ResponseCache(tmp_path / "cache")
+    monkeypatch.setattr(cache_module, "_response_cache", cache)
+    monkeypatch.setattr(backends, "_backend", backend)
+    ig = FHIRIG(make_ig(tmp_path))
+    collector = BatchCollector()
+    manager = CheckerManager(batch_collector=collector)
+    manager.register(PageTypeChecker(ig, "gpt-4o-mini"))
+    manager.register(RefsChecker(ig))
+    report = manager.check()
+    runner = BatchRunner(client, tmp_path / "batches", cache, poll_interval=0)
+    rounds = 0
+    while collector.get_requests():
+        runner.run(collector)
+        collector.clear()
+        report = manager.check()
+        rounds += 1
+    ig.close()
+    cache.close()
+    return report, rounds
+
+
+def values(report) -> dict:
+    return {check.get_name(): check.get_value() for check in report.get_checks()}
+
+
+def test_batch_responses_feed_the_checkers(tmp_path, monkeypatch):
+    backend = FakeBackend()
+    client = FakeBatchClient()
+    report, rounds = run_review(tmp_path, monkeypatch, client, backend)
+    assert rounds == 1
+    assert len(client.submitted) == 1
+    assert backend.calls == 0
+    assert len(list((tmp_path / "batches").glob("*.output.jsonl"))) == 1
+    results = values(report)
+    assert results["Presence of page: index"] is True
+    assert results["Presence of page: toc"] is True
+    assert "Presence of page: artifacts" not in results
+    assert results["Presence of at least one reference to the validation results (QA)"] is True
+
+
+def test_batch_results_are_reused_from_the_cache(tmp_path, monkeypatch):
+    run_review(tmp_path, monkeypatch, FakeBatchClient(), FakeBackend())
+    client = FakeBatchClient()
+    report, rounds = run_review(tmp_path, monkeypatch, client, FakeBackend())
+    assert rounds == 0
+    assert client.submitted == []
+    assert values(report)["Presence of page: index"] is True
+
+
+def test_failed_batch_requests_are_not_collected_again(tmp_path, monkeypatch):
+    client = FakeBatchClient({"index.html"})
+    report, rounds = run_review(tmp_path, monkeypatch, client, FakeBackend())
+    assert rounds == 1
+    assert len(client.submitted) == 1
+    assert "Presence of page: index" not in values(report)
+    assert values(report)["Presence of page: toc"] is True
+
+
+def test_local_batch_client_uses_the_backend_and_scheduler(tmp_path):
+    backend = FakeBackend()
+    scheduler = RequestScheduler()
+    client = LocalBatchClient("", backend, scheduler)
+    body = {"model": "gpt-4o-mini", "messages": [{"role": "system", "content": "s"}, {"role": "user", "content": "\nPage name: index.html"}], "seed": 1}
+    input_path = tmp_path / "batch.jsonl"
+    input_path.write_text(json.dumps({"custom_id": "k", "method": "POST", "url": "/v1/chat/completions", "body": body}) + "\n", encoding="utf-8")
+    status, output = client.poll(client.submit(input_path))
+    result = json.loads(output)
+    assert status == "completed"
+    assert result["custom_id"] == "k"
+    assert result["response"]["body"]["choices"][0]["message"]["content"] == "index"
+    assert backend.calls == 1
+    assert scheduler.get_request_count() == 1
+
+
+def test_requests_waiting_for_the_batch_are_not_reported_as_skipped(tmp_path, monkeypatch, capsys):
+    run_review(tmp_path, monkeypatch, FakeBatchClient(), FakeBackend())
+    skipped = [line for line in capsys.readouterr().out.splitlines() if "skipped" in line]
+    assert skipped == ["PageTypeChecker: type artifacts skipped (LLM error response)"]
@@ -0,0 +1,31 @@
+from veriFHIR.llm.cache import ResponseCache
+
+
+def test_size_budget_is_enforced_on_put(tmp_path):
+    cache = ResponseCache(tmp_path, max_size=100)
+    cache.put("a", "x" * 40)
+    cache.put("b", "x" * 40)
+    assert cache.get("a") == "x" * 40
+    cache.put("c", "x" * 40)
+    assert cache.get("b") is None
+    assert cache.get("a") == "x" * 40
+    assert cache.get("c") == "x" * 40
+    cache.close()
+
+
+def test_accessed_times_survive_reopen(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"
+    cache.close()
+    cache = ResponseCache(tmp_path, max_size=1)
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    cache.close()
+
+
+def test_key_depends_on_backend():
+    args = ("gpt-4o-mini", "system", "user", None, 123)
+    keys = {ResponseCache.make_key(*args), ResponseCache.make_key(*args, "OpenAIBackend:https://api.openai.com/v1/"), ResponseCache.make_key(*args, "ReplayBackend:recording.jsonl")}
+    assert len(keys) == 3
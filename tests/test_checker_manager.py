@@ -0,0 +1,48 @@
+import json
+import os
+
+from veriFHIR.checkers.checker_manager import CheckerManager
+from veriFHIR.checkers.checkers import ArtifactsChecker, RefsChecker
+from veriFHIR.ig.fhir_ig import FHIRIG
+
+
+def make_ig(path):
+    site = path / "site"
+    site.mkdir()
+    (site / "package.manifest.json").write_text(json.dumps({"fhirVersion": ["4.0.1"], "name": "test.ig", "version": "1.0.0"}), encoding="utf-8")
+    (site / "toc.html").write_text("<a href=\"index.html\">Home</a>", encoding="utf-8")
+    (site / "index.html").write_text("<p>See the <a href=\"qa.html\">QA</a></p>", encoding="utf-8")
+    for i in range(5):
+        (site / f"StructureDefinition-p{i}.json").write_text(json.dumps({"resourceType": "StructureDefinition", "id": f"p{i}", "url": f"http://example.org/StructureDefinition/p{i}",
+                                                                         "kind": "resource", "type": "Patient", "text": {}, "description": "d"}), encoding="utf-8")
+    return FHIRIG(path)
+
+
+def run(ig, **options):
+    manager = CheckerManager(**options)
+    manager.register(ArtifactsChecker(ig, check_format=True))
+    manager.register(RefsChecker(ig))
+    return [(check.get_domain(), check.get_name(), check.get_value()) for check in manager.check().get_checks()]
+
+
+def test_parallel_run_keeps_registration_order(tmp_path):
+    ig = make_ig(tmp_path)
+    try:
+        assert run(ig, workers=4) == run(ig)
+    finally:
+        ig.close()
+
+
+def test_artifact_checks_run_in_threads_with_processes(tmp_path, monkeypatch):
+    calls = []
+    check = ArtifactsChecker.check
+    monkeypatch.setattr(ArtifactsChecker, "check", lambda self: calls.append(os.getpid()) or check(self))
+    ig = make_ig(tmp_path)
+    try:
+        run(ig)
+        reads = ig.get_store().get_reads()
+        run(ig, workers=2, processes=True)
+    finally:
+        ig.close()
+    assert calls == [os.getpid(), os.getpid()]
+    assert ig.get_store().get_reads() == reads
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from veriFHIR.checkers.checkers import TextChecker
+from veriFHIR.ig.fhir_ig import FHIRIG
+from veriFHIR.llm import chunking
+from veriFHIR.llm.chunking import CHARS_PER_TOKEN, count_tokens, pack_texts, split_text
+
+
+class OfflineTiktoken:
+    def encoding_for_model(self, model):
+        raise ConnectionError("Failed to download o200k_base")
+
+    def get_encoding(self, name):
+        raise ConnectionError("Failed to download o200k_base")
+
+
+class UnknownModelTiktoken(OfflineTiktoken):
+    def encoding_for_model(self, model):
+        raise KeyError(model)
+
+
+@pytest.fixture(autouse=True)
+def clear_encodings():
+    chunking._get_encoding.cache_clear()
+    yield
+    chunking._get_encoding.cache_clear()
+
+
+def test_failed_encoding_download_falls_back_to_character_estimate(monkeypatch):
+    monkeypatch.setattr(chunking, "tiktoken", OfflineTiktoken())
+    text = "x" * 10 * CHARS_PER_TOKEN
+    assert count_tokens(text, "gpt-4o-mini") == 10
+    assert split_text(text, 4, 0, "gpt-4o-mini") == ["x" * 4 * CHARS_PER_TOKEN] * 2 + ["x" * 2 * CHARS_PER_TOKEN]
+    assert pack_texts(["a" * 8, "b" * 8, "c" * 8], 8, "gpt-4o-mini") == [["a" * 8, "b" * 8], ["c" * 8]]
+
+
+def test_unknown_model_without_default_encoding_falls_back(monkeypatch):
+    monkeypatch.setattr(chunking, "tiktoken", UnknownModelTiktoken())
+    assert count_tokens("x" * 8, "my-local-model") == 2
+
+
+def test_text_checker_packs_elements_without_tokenizer(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunking, "tiktoken", OfflineTiktoken())
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    site = tmp_path / "site"
+    site.mkdir()
+    (site / "package.manifest.json").write_text(json.dumps({"fhirVersion": ["4.0.1"], "name": "test.ig", "version": "1.0.0"}), encoding="utf-8")
+    (site / "index.html").write_text("<p>Home</p>", encoding="utf-8")
+    (site / "toc.html").write_text("<a href=\"index.html\">Home</a>", encoding="utf-8")
+    ig = FHIRIG(tmp_path)
+    try:
+        checker = TextChecker(ig, "gpt-4o-mini")
+        assert checker.get_max_element_tokens() == 2000
+        requests = checker.get_page_requests()
+    finally:
+        ig.close()
+    assert len(requests) == 1
+    assert requests[0].get_page().get_name() == "index.html"
@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from veriFHIR.ig.fhir_ig import FHIRIG
+
+
+BASE = "http://example.org/StructureDefinition"
+
+
+def write(site: Path, name: str, content):
+    (site / name).write_text(json.dumps(content) if not isinstance(content, str) else content, encoding="utf-8")
+
+
+@pytest.fixture(params=[False, True], ids=["full", "probe"])
+def ig(tmp_path, request):
+    site = tmp_path / "site"
+    site.mkdir()
+    write(site, "package.manifest.json", {"fhirVersion": ["4.0.1"], "name": "test.ig", "version": "1.0.0"})
+    write(site, "toc.html", "<a href=\"index.html\">Home</a>")
+    write(site, "index.html", "<p>See <a href=\"StructureDefinition-my-patient.html\">my patient</a>, my-observation and the <a href=\"../QA.html#errors\">QA</a>.</p>")
+    write(site, "StructureDefinition-my-patient.json", {"resourceType": "StructureDefinition", "id": "my-patient", "url": f"{BASE}/my-patient", "name": "MyPatient", "kind": "resource", "type": "Patient"})
+    write(site, "StructureDefinition-my-observation.json", {"resourceType": "StructureDefinition", "id": "my-observation", "url": f"{BASE}/my-observation", "name": "MyObservation", "kind": "resource", "type": "Observation"})
+    write(site, "StructureDefinition-my-extension.json", {"resourceType": "StructureDefinition", "id": "my-extension", "url": f"{BASE}/my-extension", "kind": "complex-type", "type": "Extension"})
+    write(site, "StructureDefinition-my-patient-copy.json", {"resourceType": "StructureDefinition", "id": "my-patient-copy", "url": f"{BASE}/my-patient", "kind": "resource", "type": "Patient"})
+    write(site, "Patient-ex1.json", {"resourceType": "Patient", "id": "ex1", "text": {"div": "<div/>"}, "meta": {"profile": [f"{BASE}/my-patient"]}})
+    write(site, "Patient-ex2.json", {"resourceType": "Patient", "id": "ex2"})
+    fhir_ig = FHIRIG(tmp_path, probe_artifacts=request.param)
+    yield fhir_ig
+    fhir_ig.close()
+
+
+def test_artifacts_by_type(ig):
+    assert sorted(a.get_id() for a in ig.get_artifacts_type("Patient")) == ["ex1", "ex2"]
+    assert sorted(a.get_id() for a in ig.get_profiles()) == ["my-observation", "my-patient", "my-patient-copy"]
+    assert ig.get_artifacts_type("ValueSet") == []
+
+
+def test_artifact_by_canonical_url(ig):
+    assert ig.get_artifact_url(f"{BASE}/my-extension").get_id() == "my-extension"
+    assert ig.get_artifact_url(f"{BASE}/my-patient").get_id() in ["my-patient", "my-patient-copy"]
+    assert ig.get_artifact_url(f"{BASE}/unknown") is None
+
+
+def test_examples_by_claimed_profile(ig):
+    assert [a.get_id() for a in ig.get_examples(f"{BASE}/my-patient")] == ["ex1"]
+    assert ig.get_examples(f"{BASE}/my-observation") == []
+
+
+def test_artifact_to_pages_reference_map(ig):
+    index = ig.get_reference_index()
+    patient = next(a for a in ig.get_profiles() if a.get_id() == "my-patient")
+    observation = ig.get_artifact_url(f"{BASE}/my-observation")
+    assert [page.get_name() for page in index.get_referenced_pages(patient)] == ["index.html"]
+    assert [reference.get_link() for reference in index.get_references(patient)] == ["my patient"]
+    assert [page.get_name() for page in index.get_referenced_pages(observation)] == ["index.html"]
+    assert index.get_references(observation)[0].get_link() is None
+
+
+def test_pages_linking_to_a_target(ig):
+    links = ig.get_reference_index().get_links("qa.html")
+    assert [(page.get_name(), href, text) for page, href, text in links] == [("index.html", "../QA.html#errors", "QA")]
+    assert ig.get_reference_index().get_links("missing.html") == []
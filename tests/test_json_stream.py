@@ -0,0 +1,90 @@
+import io
+import json
+from pathlib import PurePosixPath
+
+import pytest
+
+import veriFHIR.ig.fhir_ig as fhir_ig
+from veriFHIR.utils.json_stream import iter_json_items
+
+
+class CountingFileSystem:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.read = 0
+
+    def open(self, path):
+        fs = self
+
+        class Stream(io.BytesIO):
+            def read(self, size=-1):
+                chunk = super().read(size)
+                fs.read += len(chunk)
+                return chunk
+
+        return Stream(self.data)
+
+
+RESOURCE = {
+    "resourceType": "StructureDefinition",
+    "id": "my-patient",
+    "text": {"div": "<div>é" + "x" * 300 + "</div>"},
+    "url": "http://example.org/StructureDefinition/my-patient",
+    "version": 1.25e3,
+    "experimental": False,
+    "kind": "resource",
+    "type": "Patient",
+    "contact": [{"name": "éè \\\" team"}, None]
+}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 65536])
+def test_items_across_chunk_boundaries(chunk_size):
+    data = json.dumps(RESOURCE, ensure_ascii=False, indent=1).encode("utf-8")
+    items = list(iter_json_items(io.BytesIO(data), chunk_size))
+    assert items == list(RESOURCE.items())
+
+
+def test_utf8_bom_and_empty_object():
+    assert list(iter_json_items(io.BytesIO(b"\xef\xbb\xbf{\"resourceType\": \"Patient\"}"), 1)) == [("resourceType", "Patient")]
+    assert list(iter_json_items(io.BytesIO(b"{ }"), 1)) == []
+    assert list(iter_json_items(io.BytesIO(b"[1, 2]"), 1)) == []
+
+
+def test_number_at_chunk_end_is_not_truncated():
+    data = b'{"a": 12345678, "b": 1.5e10}'
+    for chunk_size in range(1, len(data) + 1):
+        assert list(iter_json_items(io.BytesIO(data), chunk_size)) == [("a", 12345678), ("b", 1.5e10)]
+
+
+def test_probe_stops_at_first_body_key_of_non_canonical_resource():
+    bundle = {"resourceType": "Bundle", "id": "b", "meta": {"profile": ["http://example.org/p"]}, "type": "collection",
+              "entry": [{"resource": {"resourceType": "Patient", "id": str(i), "text": {"div": "x" * 200}}} for i in range(5000)]}
+    fs = CountingFileSystem(json.dumps(bundle).encode("utf-8"))
+    header = fhir_ig._probe_artifact(fs, PurePosixPath("Bundle-b.json"))
+    assert header == {"resourceType": "Bundle", "id": "b", "meta": {"profile": ["http://example.org/p"]}}
+    assert fs.read < len(fs.data) // 10
+
+
+def test_probe_keeps_only_header_fields_of_canonical_resource():
+    fs = CountingFileSystem(json.dumps(RESOURCE).encode("utf-8"))
+    header = fhir_ig._probe_artifact(fs, PurePosixPath("StructureDefinition-my-patient.json"))
+    assert header == {"resourceType": "StructureDefinition", "id": "my-patient", "url": RESOURCE["url"], "kind": "resource", "type": "Patient"}
+
+
+def test_probe_accepts_resource_type_after_other_keys():
+    resource = {"id": "my-patient", "text": {"div": "<div/>"}, "resourceType": "StructureDefinition", "url": RESOURCE["url"], "kind": "resource", "type": "Patient"}
+    header = fhir_ig._probe_artifact(CountingFileSystem(json.dumps(resource).encode("utf-8")), PurePosixPath("StructureDefinition-my-patient.json"))
+    assert header == {key: resource[key] for key in ["id", "resourceType", "url", "kind", "type"]}
+
+
+def test_probe_finds_meta_after_body_keys():
+    resource = {"resourceType": "Patient", "id": "ex1", "text": {"div": "<div/>"}, "name": [{"family": "Doe"}], "meta": {"profile": ["http://example.org/p"]}}
+    header = fhir_ig._probe_artifact(CountingFileSystem(json.dumps(resource).encode("utf-8")), PurePosixPath("Patient-ex1.json"))
+    assert header == {"resourceType": "Patient", "id": "ex1", "meta": {"profile": ["http://example.org/p"]}}
+
+
+def test_probe_rejects_what_the_full_loader_rejects():
+    for resource in [{"resourceType": "Patient"}, {"id": "x"}, [1, 2]]:
+        fs = CountingFileSystem(json.dumps(resource).encode("utf-8"))
+        assert fhir_ig._probe_artifact(fs, PurePosixPath("x.json")) is None
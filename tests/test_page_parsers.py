@@ -0,0 +1,43 @@
+import random
+from pathlib import Path, PurePosixPath
+
+import pytest
+
+from veriFHIR.ig import page_parsers
+from veriFHIR.ig.fhir_ig import Page
+from veriFHIR.ig.page_parsers import parse_html_parser, parse_stream
+from veriFHIR.utils.filesystem import DirectoryFileSystem
+
+
+PIECES = ['<a href="x.html">', '<a href="y.html#z">', '<a href>', '<a name="n">', '</a>', '<p>', '</p>', '<div>', '</div>', '<pre>', '</pre>',
+          '<textarea>', '</textarea>', '<br>', '<br/>', '</br>', '<img src=x>', '<script>var a="<b>";</script>', '<style>p{}</style>',
+          '<template><i>t</i></template>', '<ruby>漢<rt>kan</rt><rp>(</rp></ruby>', '<!-- comment -->', '<!DOCTYPE html>', '<![CDATA[ cdata ]]>',
+          '<?pi x?>', '&amp;', '&nbsp;', '&foo;', '&#147;', '&#8221;', '&#x41;', '&#129;', '&#0;', ' ', '\n', '  \n  ', '\t', 'text', ' word ',
+          'ü', '<b>', '</b>', '<span/>', '</span>', '<a href="q.html" href="r.html">', '<table><tr><td>c</td></tr></table>', '\xa0', '<li>', '<ul>', '</ul>']
+
+
+@pytest.mark.parametrize("document", [
+    "",
+    "<html><head><title>Title</title><style>p {}</style></head><body><p>Hello <a href=\"a.html\">A <b>link</b></a></p></body></html>",
+    "<pre>  keep\n  spaces </pre>\n\n<p>  collapsed  </p>",
+    "<a href=\"x.html\">first</a><a href=\"x.html\">second</a>",
+    "<p>unclosed <a href=\"y.html\">anchor<div>block</div>",
+    "&lt;tag&gt; &amp; &eacute; &#8217; &unknown;"
+])
+def test_stream_parser_matches_beautifulsoup(document):
+    assert parse_stream(document) == parse_html_parser(document)
+
+
+def test_stream_parser_matches_beautifulsoup_on_random_documents():
+    generator = random.Random(0)
+    for _ in range(1000):
+        document = "".join(generator.choice(PIECES) for _ in range(generator.randint(1, 40)))
+        assert parse_stream(document) == parse_html_parser(document), document
+
+
+def test_lazy_page_uses_configured_parser(tmp_path: Path, monkeypatch):
+    (tmp_path / "index.html").write_text("<p>Page <a href=\"a.html\">A</a></p>", encoding="utf-8")
+    calls = []
+    monkeypatch.setitem(page_parsers.PARSERS, "stream", lambda contents: calls.append(contents) or parse_stream(contents))
+    page = Page(PurePosixPath("index.html"), "index.html", DirectoryFileSystem(tmp_path), parser="stream")
+    assert calls and page.get_links() == {"a.html": "A"}
@@ -0,0 +1,110 @@
+import json
+
+from veriFHIR.checkers.checkers import Checker
+from veriFHIR.checkers.manifest import RunManifest
+from veriFHIR.ig.fhir_ig import FHIRIG
+from veriFHIR.ig.report import Check, Proof
+from veriFHIR.ig.report_diff import DIFF_STATUSES, ReportDiff, load_run
+
+
+DOMAIN = "Pages and organization"
+
+
+def check(name, value, items=(), domain=DOMAIN):
+    return Check(name, value, Proof("Pages", tuple(items)) if items else None, domain)
+
+
+def statuses(diff: ReportDiff) -> dict:
+    return {d.get_name(): d.get_status() for d in diff.get_diffs()}
+
+
+def test_statuses():
+    old = [check("Regression: ", True), check("Improvement: ", False, ["a.html"]), check("Changed proof: ", False, ["a.html"]),
+           check("Changed unknown: ", None), check("Unchanged: ", True), check("Removed: ", True)]
+    new = [check("Regression", False, ["a.html"]), check("Improvement", True), check("Changed proof", False, ["b.html"]),
+           check("Changed unknown", True), check("Unchanged", True), check("Added", False)]
+    diff = ReportDiff(old, new)
+    assert statuses(diff) == {
+        "Regression": "regression",
+        "Improvement": "improvement",
+        "Changed proof": "changed",
+        "Changed unknown": "changed",
+        "Unchanged": "unchanged",
+        "Added": "added",
+        "Removed": "removed"
+    }
+    assert diff.count_statuses() == {status: 2 if status == "changed" else 1 for status in DIFF_STATUSES}
+    assert diff.has_regressions()
+    assert [d.get_name() for d in diff.get_by_status("changed")] == ["Changed proof", "Changed unknown"]
+
+
+def test_regression_from_unknown_value():
+    diff = ReportDiff([check("Check", None)], [check("Check", False)])
+    assert diff.get_diffs()[0].get_status() == "regression"
+
+
+def test_no_regressions():
+    diff = ReportDiff([check("Check", False)], [check("Check", True)])
+    assert not diff.has_regressions()
+
+
+def test_repeated_names_are_matched_by_occurrence_and_domain():
+    old = [check("Presence of page", True), check("Presence of page", True), check("Presence of page", True, domain="Artifacts")]
+    new = [check("Presence of page", True), check("Presence of page", False), check("Presence of page", True, domain="Artifacts")]
+    diff = ReportDiff(old, new)
+    assert [(d.get_domain(), d.get_status()) for d in diff.get_diffs()] == [(DOMAIN, "unchanged"), (DOMAIN, "regression"), ("Artifacts", "unchanged")]
+
+
+def test_added_and_removed_proof_items():
+    diff = ReportDiff([check("Check", False, ["a.html", "b.html"])], [check("Check", False, ["b.html", "c.html"])]).get_diffs()[0]
+    assert diff.get_added_items() == ["c.html"]
+    assert diff.get_removed_items() == ["a.html"]
+    assert diff.to_dict()["status"] == "changed"
+
+
+def test_write_omits_unchanged_checks(tmp_path):
+    diff = ReportDiff([check("Kept", True), check("Fixed", False)], [check("Kept", True), check("Fixed", True)])
+    path = diff.write(tmp_path / "diff.json", {"name": "ig", "version": "1.0.0"}, {"name": "ig", "version": "1.1.0"})
+    data = json.loads(path.read_text(encoding="utf-8"))
+    assert data["summary"]["improvement"] == 1
+    assert data["summary"]["unchanged"] == 1
+    assert [c["check"] for c in data["checks"]] == ["Fixed"]
+
+
+def test_load_jsonl_run(tmp_path):
+    path = tmp_path / "report.jsonl"
+    records = [{"ig": "ig", "ig_version": "1.0.0", "fhir_version": "4.0.1", "domain": DOMAIN, "check": "Check", "value": False,
+                "proof": Proof("Pages", ("a.html",)).to_dict()}]
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\n", encoding="utf-8")
+    ig, checks = load_run(path)
+    assert ig == {"name": "ig", "version": "1.0.0", "fhir_version": "4.0.1"}
+    assert ReportDiff(checks, [check("Check", False, ["a.html"])]).get_diffs()[0].get_status() == "unchanged"
+
+
+
+class StaticChecker(Checker):
+    def __init__(self, ig, checks):
+        super().__init__(ig, DOMAIN, [])
+        self._checks = checks
+
+    def check(self):
+        return self._checks
+
+
+def test_manifest_stores_checks_with_and_without_proof(tmp_path):
+    site = tmp_path / "ig" / "site"
+    site.mkdir(parents=True)
+    (site / "package.manifest.json").write_text(json.dumps({"fhirVersion": ["4.0.1"], "name": "test.ig", "version": "1.0.0"}), encoding="utf-8")
+    (site / "toc.html").write_text("<a href=\"index.html\">Home</a>", encoding="utf-8")
+    (site / "index.html").write_text("<p>Home</p>", encoding="utf-8")
+    ig = FHIRIG(tmp_path / "ig")
+    checks = [check("With proof", False, ["a.html"]), check("Without proof", True)]
+    checker = StaticChecker(ig, checks)
+    manifest = RunManifest(ig)
+    manifest.put_checks(checker, checker.check())
+    path = manifest.write(tmp_path / "manifest.json")
+    reused = RunManifest(ig, RunManifest.load(path)).get_checks(checker)
+    ig.close()
+    _, loaded = load_run(path)
+    assert [c.get_proof() for c in loaded] == [c.get_proof() for c in checks]
+    assert [c.get_proof() for c in reused] == [c.get_proof() for c in checks]
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import openai
+import pytest
+
+from veriFHIR.llm import scheduler as scheduler_module
+from veriFHIR.llm.scheduler import InFlightLimiter, RequestScheduler
+
+
+def rate_limit_error(headers=None):
+    response = httpx.Response(429, headers=headers or {}, request=httpx.Request("POST", "http://localhost/v1/chat/completions"))
+    return openai.RateLimitError("rate limited", response=response, body=None)
+
+
+def bad_request_error():
+    response = httpx.Response(400, request=httpx.Request("POST", "http://localhost/v1/chat/completions"))
+    return openai.BadRequestError("bad request", response=response, body=None)
+
+
+class Flaky:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(scheduler_module.time, "sleep", delays.append)
+    return delays
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ({"retry-after": "3"}, 3.0),
+    ({"retry-after-ms": "250", "retry-after": "3"}, 0.25),
+    ({"retry-after": "not a date"}, None),
+    ({}, None)
+])
+def test_retry_after_headers(headers, expected):
+    assert RequestScheduler._retry_after(rate_limit_error(headers)) == expected
+
+
+def test_retry_after_http_date():
+    date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 < RequestScheduler._retry_after(rate_limit_error({"retry-after": date})) <= 30
+
+
+def test_retry_after_header_is_honoured(sleeps):
+    scheduler = RequestScheduler(max_retries=3)
+    function = Flaky([rate_limit_error({"retry-after": "2"}), rate_limit_error({"retry-after-ms": "500"})])
+    assert scheduler.call(function) == "ok"
+    assert sleeps == [2.0, 0.5]
+    assert (scheduler.get_request_count(), scheduler.get_attempt_count(), scheduler.get_retry_count(), scheduler.get_failure_count()) == (1, 3, 2, 0)
+
+
+def test_exponential_backoff_is_bounded(sleeps):
+    scheduler = RequestScheduler(max_retries=6, base_delay=1, max_delay=8)
+    function = Flaky([rate_limit_error() for _ in range(6)])
+    assert scheduler.call(function) == "ok"
+    assert all(0 <= delay <= min(8, 2 ** attempt) for attempt, delay in enumerate(sleeps))
+
+
+def test_failures_are_not_retried_beyond_limit(sleeps):
+    scheduler = RequestScheduler(max_retries=2)
+    assert scheduler.call(Flaky([rate_limit_error() for _ in range(5)])) is None
+    assert scheduler.call(Flaky([bad_request_error()])) is None
+    assert (scheduler.get_request_count(), scheduler.get_attempt_count(), scheduler.get_retry_count(), scheduler.get_failure_count()) == (2, 4, 2, 2)
+
+
+def test_async_retries(monkeypatch):
+    async def no_sleep(delay):
+        pass
+    scheduler = RequestScheduler(max_retries=3)
+    errors = [rate_limit_error({"retry-after": "1"})]
+
+    async def function():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    async def run():
+        monkeypatch.setattr(scheduler_module.asyncio, "sleep", no_sleep)
+        return await scheduler.async_call(function)
+
+    assert asyncio.run(run()) == "ok"
+    assert (scheduler.get_request_count(), scheduler.get_attempt_count(), scheduler.get_retry_count()) == (1, 2, 1)
+
+
+def test_in_flight_limit_is_shared_by_threads_and_tasks():
+    scheduler = RequestScheduler(max_in_flight=2)
+    lock = threading.Lock()
+    state = {"current": 0, "max": 0}
+
+    def enter():
+        with lock:
+            state["current"] += 1
+            state["max"] = max(state["max"], state["current"])
+
+    def leave():
+        with lock:
+            state["current"] -= 1
+
+    def sync_request():
+        enter()
+        time.sleep(0.01)
+        leave()
+        return "ok"
+
+    async def async_request():
+        enter()
+        await asyncio.sleep(0.01)
+        leave()
+        return "ok"
+
+    async def run_tasks():
+        return await asyncio.gather(*(scheduler.async_call(async_request) for _ in range(20)))
+
+    threads = [threading.Thread(target=scheduler.call, args=(sync_request,)) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    results = asyncio.run(run_tasks())
+    for thread in threads:
+        thread.join()
+    assert results == ["ok"] * 20
+    assert state["max"] <= 2
+    assert scheduler.get_request_count() == 30
+
+
+def test_limiter_survives_cancelled_waiter():
+    limiter = InFlightLimiter(1)
+
+    async def run():
+        await limiter.async_acquire()
+        waiter = asyncio.ensure_future(limiter.async_acquire())
+        other = asyncio.ensure_future(limiter.async_acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        limiter.release()
+        await asyncio.wait_for(other, 1)
+
+    asyncio.run(run())
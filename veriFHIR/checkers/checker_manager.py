@@ -1,20 +1,215 @@
-from typing import List
-from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import nullcontext
+import json
+import textwrap
 
-from veriFHIR.checkers.checkers import Checker
+from veriFHIR.checkers.checkers import Checker, LLMChecker, PageRequest
+from veriFHIR.checkers.manifest import RunManifest
+from veriFHIR.ig.fhir_ig import Page
 from veriFHIR.ig.report import Report, Check
+from veriFHIR.llm.gpt import GPT
+from veriFHIR.llm.batch import BatchCollector
+from veriFHIR.llm.chunking import split_text
+from veriFHIR.llm.response_formats import get_combined_response_format
+
+
+def _run_checker(index: int, checker: Checker) -> Dict[int, List[Check]]:
+    return {index: checker.check()}
 
 
 class CheckerManager:
-    def __init__(self):
+    def __init__(self, combined: bool = False, workers: Optional[int] = None, processes: bool = False, manifest: Optional[RunManifest] = None, batch_collector: Optional[BatchCollector] = None):
         self.checkers: List[Checker] = []
-        
-    def register(self, checker: Checker):
+        self._dependencies: List[Set[int]] = []
+        self._combined: bool = combined
+        self._workers: Optional[int] = workers
+        self._processes: bool = processes
+        self._manifest: Optional[RunManifest] = manifest
+        self._batch_collector: Optional[BatchCollector] = batch_collector
+
+    def register(self, checker: Checker, depends_on: Optional[List[Checker]] = None):
+        dependencies: Set[int] = set()
+        for dependency in depends_on or []:
+            if not any(dependency is c for c in self.checkers):
+                raise Exception(f"{type(dependency).__name__} must be registered before the checkers depending on it.")
+            dependencies.add(next(i for i, c in enumerate(self.checkers) if dependency is c))
         self.checkers.append(checker)
+        self._dependencies.append(dependencies)
+
+    def is_combined(self) -> bool:
+        return self._combined
+    def get_workers(self) -> Optional[int]:
+        return self._workers
+    def use_processes(self) -> bool:
+        return self._processes
+    def get_manifest(self) -> Optional[RunManifest]:
+        return self._manifest
+    def get_batch_collector(self) -> Optional[BatchCollector]:
+        return self._batch_collector
+
+    def _get_units(self) -> List[Tuple[List[int], Set[int], bool]]:
+        combined: List[int] = []
+        if self.is_combined():
+            combined = [i for i, c in enumerate(self.checkers) if isinstance(c, LLMChecker) and c.get_task_name() is not None]
+        units: List[Tuple[List[int], Set[int], bool]] = []
+        for i in range(len(self.checkers)):
+            if i not in combined:
+                units.append(([i], self._dependencies[i], False))
+            elif i == combined[0]:
+                dependencies: Set[int] = set().union(*(self._dependencies[c] for c in combined)) - set(combined)
+                units.append((combined, dependencies, True))
+        return units
+
+    def _run_unit(self, unit: Tuple[List[int], Set[int], bool]) -> Dict[int, List[Check]]:
+        indexes, _, combined = unit
+        if combined:
+            return self._combined_check(indexes)
+        return _run_checker(indexes[0], self.checkers[indexes[0]])
+
+    def _reuse_unit(self, unit: Tuple[List[int], Set[int], bool]) -> Optional[Dict[int, List[Check]]]:
+        indexes, _, combined = unit
+        manifest: Optional[RunManifest] = self.get_manifest()
+        if manifest is None or combined or isinstance(self.checkers[indexes[0]], LLMChecker):
+            return None
+        checks: Optional[List[Check]] = manifest.get_checks(self.checkers[indexes[0]])
+        if checks is None:
+            return None
+        return {indexes[0]: checks}
+
+    def _record_results(self, results: Dict[int, List[Check]]):
+        manifest: Optional[RunManifest] = self.get_manifest()
+        if manifest is None:
+            return
+        for i, checks in results.items():
+            manifest.put_checks(self.checkers[i], checks)
+
+    def _run_sequential(self, units: List[Tuple[List[int], Set[int], bool]]) -> Dict[int, List[Check]]:
+        results: Dict[int, List[Check]] = {}
+        pending: List[int] = list(range(len(units)))
+        while pending:
+            u: int = next(u for u in pending if units[u][1] <= results.keys())
+            pending.remove(u)
+            reused: Optional[Dict[int, List[Check]]] = self._reuse_unit(units[u])
+            results.update(reused if reused is not None else self._run_unit(units[u]))
+        return results
+
+    def _run_parallel(self, units: List[Tuple[List[int], Set[int], bool]]) -> Dict[int, List[Check]]:
+        results: Dict[int, List[Check]] = {}
+        pending: List[int] = list(range(len(units)))
+        running: Dict[Future, int] = {}
+        cpu_bound: bool = self.use_processes() and any(c.is_cpu_bound() for c in self.checkers)
+        with ThreadPoolExecutor(self.get_workers()) as threads, (ProcessPoolExecutor(self.get_workers()) if cpu_bound else nullcontext()) as processes:
+            while pending or running:
+                for u in [u for u in pending if units[u][1] <= results.keys()]:
+                    pending.remove(u)
+                    indexes, _, combined = units[u]
+                    reused: Optional[Dict[int, List[Check]]] = self._reuse_unit(units[u])
+                    if reused is not None:
+                        results.update(reused)
+                    elif processes is not None and not combined and self.checkers[indexes[0]].is_cpu_bound():
+                        running[processes.submit(_run_checker, indexes[0], self.checkers[indexes[0]])] = u
+                    else:
+                        running[threads.submit(self._run_unit, units[u])] = u
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    running.pop(future)
+                    results.update(future.result())
+        return results
 
     def check(self) -> Report:
         report: Report = Report()
         for checker in self.checkers:
-            checks: List[Check] = checker.check()
-            report.add_checks(checks)
-        return report
\ No newline at end of file
+            if isinstance(checker, LLMChecker):
+                checker.set_manifest(self.get_manifest())
+                for llm in [checker.get_llm(), checker.get_llm_additional()]:
+                    if llm is not None:
+                        llm.set_batch_collector(self.get_batch_collector())
+        units: List[Tuple[List[int], Set[int], bool]] = self._get_units()
+        if self.get_workers() is None or self.get_workers() <= 1: #type: ignore
+            results: Dict[int, List[Check]] = self._run_sequential(units)
+        else:
+            results = self._run_parallel(units)
+        self._record_results(results)
+        for i in range(len(self.checkers)):
+            report.add_checks(results[i])
+        return report
+
+    def _combined_system_prompt(self, checkers: List[LLMChecker]) -> str:
+        system_prompt: str = """
+        You review a page of a FHIR Implementation Guide. Several independent tasks are applied to the same page.
+        Each task has its own instructions and, in the user message, its own inputs under the same task heading.
+        Answer every task listed in the user message in the field of the output JSON object named after the task, following the output format of its instructions.
+        A task expecting a plain text answer gets a string, or null if it returns None.
+
+        **Constraints:**
+        - Output only valid JSON.
+        """
+        sections: List[str] = [textwrap.dedent(system_prompt).strip()]
+        for checker in checkers:
+            sections.append(f"### Task `{checker.get_task_name()}`\n{textwrap.dedent(checker.get_llm().get_guidelines_prompt()).strip()}")
+        return "\n\n".join(sections)
+
+    def _combined_check(self, indexes: List[int]) -> Dict[int, List[Check]]:
+        checkers: List[LLMChecker] = [self.checkers[i] for i in indexes] #type: ignore
+        lead: LLMChecker = checkers[0]
+        system_prompt: str = self._combined_system_prompt(checkers)
+        llm: GPT = GPT(system_prompt, lead.get_api_key(), lead.get_model(), lead.get_concurrency())
+        llm.set_batch_collector(self.get_batch_collector())
+        requests: List[List[PageRequest]] = [checker.get_page_requests() for checker in checkers]
+        responses: List[List[List[Optional[str]]]] = [[[] for _ in checker_requests] for checker_requests in requests]
+
+        manifest: Optional[RunManifest] = self.get_manifest()
+        keys: List[List[Optional[str]]] = [[manifest.get_request_key(checker, request, system_prompt) if manifest else None for request in checker_requests] for checker, checker_requests in zip(checkers, requests)]
+
+        pages: List[Page] = []
+        page_requests: Dict[int, List[List[int]]] = {}
+        for c, checker_requests in enumerate(requests):
+            for r, request in enumerate(checker_requests):
+                reused: Optional[List[Optional[str]]] = manifest.get_responses(checkers[c], keys[c][r]) if manifest else None #type: ignore
+                if reused is not None:
+                    responses[c][r] = reused
+                    continue
+                page: Page = request.get_page()
+                if id(page) not in page_requests:
+                    pages.append(page)
+                    page_requests[id(page)] = [[] for _ in checkers]
+                page_requests[id(page)][c].append(r)
+
+        user_prompts: List[Tuple[str, Optional[dict]]] = []
+        targets: List[List[Tuple[int, int]]] = []
+        for page in pages:
+            rounds: int = max(len(r) for r in page_requests[id(page)])
+            for w, chunk in enumerate(split_text(page.get_text(), lead.get_max_page_tokens(), lead.get_chunk_overlap(), lead.get_model())):
+                for k in range(rounds):
+                    tasks: List[Tuple[int, int]] = [(c, page_requests[id(page)][c][k]) for c, checker in enumerate(checkers)
+                                                    if k < len(page_requests[id(page)][c]) and (w == 0 or not checker.is_first_window_only())]
+                    if not tasks:
+                        continue
+                    sections: List[str] = [f"### Task `{checkers[c].get_task_name()}`{requests[c][r].get_prompt()}" for c, r in tasks]
+                    user_prompt: str = "\n".join(sections) + f"\nPage content: {chunk}"
+                    response_format: dict = get_combined_response_format("page_review", {checkers[c].get_task_name(): checkers[c].get_task_schema() for c, _ in tasks}) #type: ignore
+                    user_prompts.append((user_prompt, response_format))
+                    targets.append(tasks)
+
+        for tasks, response in zip(targets, llm.openai_chat_completion_responses(user_prompts)):
+            response_json: Any = None
+            if response:
+                try:
+                    response_json = json.loads(response)
+                except:
+                    response_json = None
+            for c, r in tasks:
+                task_response: Optional[str] = None
+                if isinstance(response_json, dict) and checkers[c].get_task_name() in response_json:
+                    task_response = checkers[c].format_task_response(response_json[checkers[c].get_task_name()])
+                responses[c][r].append(task_response)
+
+        if manifest is not None:
+            for c, checker_requests in enumerate(requests):
+                for r, request in enumerate(checker_requests):
+                    manifest.put_responses(checkers[c], keys[c][r], request.get_page(), responses[c][r]) #type: ignore
+
+        return {i: checker.check_responses(requests[c], responses[c]) for c, (i, checker) in enumerate(zip(indexes, checkers))}
@@ -1,18 +1,22 @@
 from abc import abstractmethod
 import os
-from dotenv import load_dotenv
-from pathlib import Path
 import json
 import textwrap
-from typing import Tuple, Optional, List, Dict, Tuple
+from typing import Any, Tuple, Optional, List, Dict, Tuple
 import re
 from collections import defaultdict
 from itertools import combinations
 
-from veriFHIR.ig.fhir_ig import FHIRIG, Artifact
-from veriFHIR.ig.report import Check
+from veriFHIR.ig.fhir_ig import FHIRIG, Artifact, Page, ReferenceIndex
+from veriFHIR.ig.report import Check, Proof
 from veriFHIR.llm.gpt import GPT
-from veriFHIR.llm.response_formats import TextCheckResponses
+from veriFHIR.llm.batch import BatchCollector
+from veriFHIR.llm.clients import load_environment
+from veriFHIR.llm.backends import LLMBackend, get_backend
+from veriFHIR.llm.chunking import split_text, pack_texts
+from veriFHIR.llm.response_formats import TextCheckResponses, AmbiguityResponses
+from veriFHIR.checkers.prefilter import PageMatcher, find_artifact_reference
+from veriFHIR.utils.multi_pattern import normalize_text
 
 
 class Checker:
@@ -32,35 +36,32 @@ class Checker:
     def check(self) -> List[Check]:
         pass
 
-    def _format_proof(self, title: str, elements: List, reverse: bool = False) -> Optional[str]:
+    def is_cpu_bound(self) -> bool:
+        return False
+
+    def reads_pages(self) -> bool:
+        return True
+
+    def reads_artifacts(self) -> bool:
+        return True
+
+    def _format_proof(self, title: str, elements: List, reverse: bool = False) -> Optional[Proof]:
         if len(elements) == 0:
             return None
         if isinstance(elements[0], tuple) and not isinstance(elements[0][1], list):
             temp: Dict = defaultdict(list)
             for elem in elements:
                 temp[elem[1].strip()].append(elem[0])
-            elements = [(", ".join(vals), key) for key, vals in temp.items()]
-        proof_lines: List[str] = [f"{title}: "]
-        proof_lines.append("<ul>")
+            return Proof(title, tuple((tuple(vals), key) for key, vals in temp.items()), reverse)
+        items: List = []
         for elem in elements:
             if isinstance(elem, str):
-                proof_lines.append(f"<li>{elem}</li>")
+                items.append(elem)
             elif isinstance(elem[1], list):
-                proof_lines.append("<li>")
-                proof_lines.append(f"{elem[0]}:")
-                proof_lines.append("<ul>")
-                for sub_elem in elem[1]:
-                    proof_lines.append(f"<li>{sub_elem}</li>")
-                proof_lines.append("</ul>")
-                proof_lines.append("</li>")
+                items.append((elem[0], tuple(elem[1])))
             else:
-                if reverse:
-                    proof_lines.append(f"<li>{elem[1]}: {elem[0]}</li>")
-                else:
-                    proof_lines.append(f"<li>{elem[0]}: {elem[1]}</li>")
-        proof_lines.append("</ul>")
-        proof: str = "\n".join(proof_lines)
-        return proof
+                items.append(((elem[0],), elem[1]))
+        return Proof(title, tuple(items), reverse)
     
     def _normalize_bool(self, value) -> Optional[bool]:
         if value is True:
@@ -88,6 +89,9 @@ class ArtifactsChecker(Checker):
         self._check_format : bool = check_format
         self._check_examples : bool = check_examples
 
+    def reads_pages(self) -> bool:
+        return False
+
     def check(self):
         checks: List[Check] = []
         artifacts: List[Artifact] = self.get_ig().get_artifacts()
@@ -101,9 +105,9 @@ class ArtifactsChecker(Checker):
             else:
                 artifacts_type = artifacts
             value: Optional[bool] = None
-            proof: Optional[str] = None
+            proof: Optional[Proof] = None
             if not artifacts_type:
-                proof = "No artifacts found for this type."
+                proof = Proof("No artifacts found for this type.")
             else:
                 for artifact in artifacts_type:
                     artifact_content: Dict = artifact.get_content()
@@ -119,28 +123,20 @@ class ArtifactsChecker(Checker):
 
         if self._check_examples:
             missing_examples: List = []
-            profiles: List[Artifact] = [artifact for artifact in self.get_ig().get_artifacts_type("StructureDefinition") if artifact.get_content().get("kind") == "resource"]
+            profiles: List[Artifact] = self.get_ig().get_profiles()
             for profile in profiles:
-                content: Dict = profile.get_content()
-                resource: Optional[str] = content.get("type")
-                url: Optional[str] = content.get("url")
+                resource: Optional[str] = profile.get_type()
+                url: Optional[str] = profile.get_url()
                 if resource:
-                    examples_resource: List[Artifact] = self.get_ig().get_artifacts_type(resource)
-                    value_example: bool = False
-                    for example in examples_resource:
-                        example_content: Optional[dict] = example.get_content()
-                        meta: Optional[dict] = example_content.get("meta") if example_content else None
-                        example_profiles: Optional[list] = meta.get("profile") if isinstance(meta, dict) else None
-                        if example_profiles and url in example_profiles:
-                            value_example = True
-                            break
+                    examples: List[Artifact] = self.get_ig().get_examples(url) if url else []
+                    value_example: bool = any(example.get_resource_type() == resource for example in examples)
                     if not value_example:
-                        missing_examples.append(content.get("id"))
-            proof_examples: Optional[str] = None
+                        missing_examples.append(profile.get_id())
+            proof_examples: Optional[Proof] = None
             value_examples: bool = True
             if len(missing_examples) > 0:
                 value_examples = False
-                proof_examples = self._format_proof("Missing example for profile(s): ",  missing_examples)
+                proof_examples = self._format_proof("Missing example for profile(s)",  missing_examples)
             checks.append(Check(f"Presence of at least one example for each profile: ", value_examples, proof_examples, self.get_domain()))
 
         if self._check_format:
@@ -177,7 +173,7 @@ class ArtifactsChecker(Checker):
                         format_results["MATCH"].append(f"{element_values} ({mismatch_values})")
             for element, result in format_results.items():
                 value_format: bool = True
-                proof_format: Optional[str] = None
+                proof_format: Optional[Proof] = None
                 title: str = "Artifacts id-name/title match:" if element == "MATCH" else f"Artifact {element} in {formats[element]['name']} format: "
                 proof_title: str = "Artifacts with mismatches" if element == "MATCH" else f"Artifacts with invalid {element} format"
                 if len(result) > 0:
@@ -196,33 +192,58 @@ class RefsChecker(Checker):
         ]
         super().__init__(ig, domain, elements)
 
+    def reads_artifacts(self) -> bool:
+        return False
+
     def check(self):
         checks: List[Check] = []
         if self.get_ig().get_metadata().get_ig_type() == "IGPublisher":
+            index: ReferenceIndex = self.get_ig().get_reference_index()
             for ref, ref_desc in self.get_elements():
-                refs: List = []
-                for page in self.get_ig().get_pages():
-                    pages_refs: Dict[str, str] = page.get_links()
-                    for page_ref, page_ref_desc in pages_refs.items():
-                        if ref in page_ref:
-                            refs.append((page.get_name(), f"\"{page_ref_desc}\" ({page_ref})"))
+                refs: List = [(page.get_name(), f"\"{page_ref_desc}\" ({page_ref})") for page, page_ref, page_ref_desc in index.get_links(ref)]
                 value: bool = False
-                proof: Optional[str] = None
+                proof: Optional[Proof] = None
                 if len(refs) > 0:
                     value = True
-                    proof = self._format_proof("Extract per page: ", refs)
+                    proof = self._format_proof("Extract per page", refs)
                 checks.append(Check(f"Presence of at least one reference to {ref_desc}", value, proof, self.get_domain()))
         return checks
 
 
+class PageRequest:
+    def __init__(self, page: Page, prompt: str, content_prefix: str, response_format: Optional[dict] = None, data: Any = None):
+        self._page: Page = page
+        self._prompt: str = prompt
+        self._content_prefix: str = content_prefix
+        self._response_format: Optional[dict] = response_format
+        self._data: Any = data
+
+    def get_page(self) -> Page:
+        return self._page
+    def get_prompt(self) -> str:
+        return self._prompt
+    def get_content_prefix(self) -> str:
+        return self._content_prefix
+    def get_response_format(self) -> Optional[dict]:
+        return self._response_format
+    def get_data(self) -> Any:
+        return self._data
+
+
 class LLMChecker(Checker):
-    def __init__(self, ig: FHIRIG, domain: str, elements: List, model: str):
+    def __init__(self, ig: FHIRIG, domain: str, elements: List, model: str, concurrency: int = 1, max_page_tokens: Optional[int] = None, chunk_overlap: int = 200):
         super().__init__(ig, domain, elements) 
-        load_dotenv(dotenv_path=Path("veriFHIR", "config", ".env"))
-        if os.getenv("OPENAI_API_KEY") is None:
+        load_environment()
+        backend: Optional[LLMBackend] = get_backend()
+        if os.getenv("OPENAI_API_KEY") is None and (backend is None or backend.requires_api_key()):
             raise Exception("OpenAI API key not found.")
-        self._api_key: str = os.getenv("OPENAI_API_KEY") #type: ignore
+        self._api_key: str = os.getenv("OPENAI_API_KEY", "")
         self._model: str = model
+        self._concurrency: int = concurrency
+        self._max_page_tokens: Optional[int] = max_page_tokens
+        self._chunk_overlap: int = chunk_overlap
+        self._manifest: Any = None
+        self._prefiltered: Dict[str, Dict[str, Tuple[Optional[bool], Optional[str]]]] = {}
         self._llm: GPT
         self._llm_additional: Optional[GPT]
         self._llm, self._llm_additional = self._set_llm()
@@ -231,21 +252,98 @@ class LLMChecker(Checker):
         return self._api_key
     def get_model(self) -> str:
         return self._model
+    def get_concurrency(self) -> int:
+        return self._concurrency
+    def get_max_page_tokens(self) -> Optional[int]:
+        return self._max_page_tokens
+    def get_chunk_overlap(self) -> int:
+        return self._chunk_overlap
+    def get_manifest(self) -> Any:
+        return self._manifest
+    def set_manifest(self, manifest: Any):
+        self._manifest = manifest
     def get_llm(self) -> GPT:
         return self._llm
     def get_llm_additional(self) -> Optional[GPT]:
         return self._llm_additional
     
+    def _print_skipped(self, message: str):
+        collector: Optional[BatchCollector] = self.get_llm().get_batch_collector()
+        if collector is None or not collector.get_requests():
+            print(message)
+
     @abstractmethod
     def _set_llm(self) -> Tuple[GPT, Optional[GPT]]:
         pass
 
+    @abstractmethod
+    def get_page_requests(self) -> List[PageRequest]:
+        pass
+
+    @abstractmethod
+    def check_responses(self, requests: List[PageRequest], page_responses: List[List[Optional[str]]]) -> List[Check]:
+        pass
+
+    def check(self) -> List[Check]:
+        requests: List[PageRequest] = self.get_page_requests()
+        return self.check_responses(requests, self._page_responses(requests))
+
+    def get_task_name(self) -> Optional[str]:
+        return None
+
+    def get_task_schema(self) -> Any:
+        return None
+
+    def format_task_response(self, value: Any) -> Optional[str]:
+        return json.dumps(value)
+
+    def is_first_window_only(self) -> bool:
+        return False
+
+    def prefilter_page(self, page: Page) -> Dict[str, Tuple[Optional[bool], Optional[str]]]:
+        return {}
+
+    def get_prefilter(self, page: Page) -> Dict[str, Tuple[Optional[bool], Optional[str]]]:
+        path: str = str(page.get_path())
+        if path not in self._prefiltered:
+            self._prefiltered[path] = self.prefilter_page(page)
+        return self._prefiltered[path]
+
+    def split_page(self, text: str) -> List[str]:
+        chunks: List[str] = split_text(text, self.get_max_page_tokens(), self.get_chunk_overlap(), self.get_model())
+        if self.is_first_window_only():
+            return chunks[:1]
+        return chunks
+
+    def _page_responses(self, requests: List[PageRequest]) -> List[List[Optional[str]]]:
+        page_responses: List[List[Optional[str]]] = [[] for _ in requests]
+        keys: List[Optional[str]] = [self.get_manifest().get_request_key(self, request) if self.get_manifest() else None for request in requests]
+        user_prompts: List[Tuple[str, Optional[dict]]] = []
+        chunk_counts: List[Tuple[int, int]] = []
+        for i, request in enumerate(requests):
+            reused: Optional[List[Optional[str]]] = self.get_manifest().get_responses(self, keys[i]) if self.get_manifest() else None
+            if reused is not None:
+                page_responses[i] = reused
+                continue
+            chunks: List[str] = self.split_page(request.get_page().get_text())
+            chunk_counts.append((i, len(chunks)))
+            user_prompts.extend((f"{request.get_prompt()}{request.get_content_prefix()}{chunk}", request.get_response_format()) for chunk in chunks)
+        responses: List[Optional[str]] = self.get_llm().openai_chat_completion_responses(user_prompts)
+        start: int = 0
+        for i, chunk_count in chunk_counts:
+            page_responses[i] = responses[start:start + chunk_count]
+            start += chunk_count
+        if self.get_manifest():
+            for key, request, responses_page in zip(keys, requests, page_responses):
+                self.get_manifest().put_responses(self, key, request.get_page(), responses_page)
+        return page_responses
+
 
 class AllPagesChecker(LLMChecker):
-    def __init__(self, ig: FHIRIG, model: str):
+    def __init__(self, ig: FHIRIG, model: str, concurrency: int = 1, max_page_tokens: Optional[int] = None, chunk_overlap: int = 200):
         domain: str = "Pages and organization"
         elements: List[str] = ["FHIR version", "IG version"]
-        super().__init__(ig, domain, elements, model) 
+        super().__init__(ig, domain, elements, model, concurrency, max_page_tokens, chunk_overlap) 
 
     def _set_llm(self):
         system_prompt: str = """
@@ -259,47 +357,88 @@ class AllPagesChecker(LLMChecker):
             - Do not include additional explanations, comments, or Markdown formatting.
             - Output only valid JSON.
         """      
-        llm: GPT = GPT(system_prompt, self.get_api_key(), self.get_model())
+        llm: GPT = GPT(system_prompt, self.get_api_key(), self.get_model(), self.get_concurrency())
         return (llm, None)
     
-    def check(self):
+    def get_task_name(self) -> Optional[str]:
+        return "information"
+
+    def get_task_schema(self) -> Any:
+        return Dict[str, bool]
+
+    def _get_elem_ids(self) -> Dict[str, str]:
+        return {elem.strip().lower().replace(" ", "_"): elem for elem in self.get_elements()}
+
+    def prefilter_page(self, page: Page) -> Dict[str, Tuple[Optional[bool], Optional[str]]]:
+        matcher: PageMatcher = PageMatcher(page)
+        decisions: Dict[str, Tuple[Optional[bool], Optional[str]]] = {}
+        fhir_version: str = normalize_text(self.get_ig().get_metadata().get_fhir_version() or "")
+        if matcher.search(r'based on fhir\s*[0-6]') or (fhir_version and matcher.search(rf'fhir\s*(version\s*:?\s*|v)?{re.escape(fhir_version)}(?![\w.\-])')):
+            decisions["fhir_version"] = (True, None)
+        version: str = normalize_text(self.get_ig().get_metadata().get_version() or "")
+        if version and matcher.search(rf'version\s*:?\s*{re.escape(version)}(?![\w.\-])'):
+            decisions["ig_version"] = (True, None)
+        return decisions
+
+    def get_page_requests(self) -> List[PageRequest]:
+        elem_ids: Dict[str, str] = self._get_elem_ids()
+        requests: List[PageRequest] = []
+        for page in self.get_ig().get_pages():
+            decisions: Dict[str, Tuple[Optional[bool], Optional[str]]] = self.get_prefilter(page)
+            elem_ids_page = {elem_id: elem for elem_id, elem in elem_ids.items() if decisions.get(elem_id, (None, None))[0] is None}
+            if not elem_ids_page:
+                continue
+            select_elements: str =  "\n* ".join(elem_ids_page.keys())
+            user_prompt: str = f"\nElements:\n* {select_elements}"
+            requests.append(PageRequest(page, user_prompt, "\nPage content: ", None, elem_ids_page))
+        return requests
+
+    def check_responses(self, requests: List[PageRequest], page_responses: List[List[Optional[str]]]) -> List[Check]:
         checks: List[Check] = []
-        elem_ids: Dict[str, str] = {elem.strip().lower().replace(" ", "_"): elem for elem in self.get_elements()}
+        elem_ids: Dict[str, str] = self._get_elem_ids()
         results_ko: Dict[str, List[str]] = {elem_id: [] for elem_id in elem_ids}
+        page_requests: Dict[str, Tuple[PageRequest, List[Optional[str]]]] = {str(request.get_page().get_path()): (request, responses) for request, responses in zip(requests, page_responses)}
         for page in self.get_ig().get_pages():
-            elem_ids_page = elem_ids.copy()
-            page_text = page.get_text()
-            if "fhir_version" in elem_ids_page:
-                match = re.search(r'based on fhir\s*[0-6]', page_text, re.IGNORECASE)
-                if match :
-                    del elem_ids_page["fhir_version"]
-            select_elements: str =  "\n* ".join(elem_ids_page.keys())
-            user_prompt: str = f"\nElements:\n* {select_elements}\nPage content: {page_text}"
-            response: Optional[str] = self.get_llm().openai_chat_completion_response(user_prompt)
-            response_bool: bool = False
-            if response:
-                try:
-                    response_json = json.loads(response)
-                except:
-                    continue
-                if isinstance(response_json, dict):
-                    response_bool = True
-                    for elem_id in results_ko.keys():
-                        if elem_id in elem_ids_page:
+            for elem_id, (decision, _) in self.get_prefilter(page).items():
+                if decision is False and elem_id in results_ko:
+                    results_ko[elem_id].append(page.get_name())
+            if str(page.get_path()) not in page_requests:
+                continue
+            request, responses = page_requests[str(page.get_path())]
+            elem_ids_page: Dict[str, str] = request.get_data()
+            responses_json: List[Dict] = []
+            invalid_json: int = 0
+            for response in responses:
+                if response:
+                    try:
+                        response_json = json.loads(response)
+                    except:
+                        invalid_json += 1
+                        continue
+                    if isinstance(response_json, dict):
+                        responses_json.append(response_json)
+            if responses_json:
+                for elem_id in results_ko.keys():
+                    if elem_id in elem_ids_page:
+                        found: bool = False
+                        for response_json in responses_json:
                             bool_value: Optional[bool] = None
                             for raw_key, raw_value in response_json.items():
                                 key: str = raw_key.strip().lower().replace(" ", "_")
                                 if key == elem_id:
                                     bool_value = self._normalize_bool(raw_value)
                                     break
-                            if bool_value is not True:
-                                results_ko[elem_id].append(page.get_name())
-            if not response_bool:
-                print(f"AllPagesChecker: page {page.get_name()} skipped (LLM error response)")
+                            if bool_value is True:
+                                found = True
+                                break
+                        if not found:
+                            results_ko[elem_id].append(page.get_name())
+            elif invalid_json < len(responses):
+                self._print_skipped(f"AllPagesChecker: page {page.get_name()} skipped (LLM error response)")
         
         for elem_id, pages_ko in results_ko.items():
             value: bool = True
-            proof: Optional[str] = None 
+            proof: Optional[Proof] = None 
             if len(pages_ko) > 0:
                 value = False
                 proof = self._format_proof(f"Missing information {elem_ids[elem_id]} in pages", pages_ko)
@@ -308,25 +447,40 @@ class AllPagesChecker(LLMChecker):
 
 
 class PageTypeChecker(LLMChecker):
-    def __init__(self, ig: FHIRIG, model: str):
+    def __init__(self, ig: FHIRIG, model: str, concurrency: int = 1, max_page_tokens: Optional[int] = None, chunk_overlap: int = 200):
         domain: str = "Pages and organization"
         elements: List[str] = ["index", "toc", "artifacts"]
-        super().__init__(ig, domain, elements, model) 
+        super().__init__(ig, domain, elements, model, concurrency, max_page_tokens, chunk_overlap) 
 
     def _set_llm(self):
         base_prompt: str = "Given the name and content of a FHIR implementation guide page, determine which type it matches. Return only one type or None if it does not match any."
         system_prompt: str = f"{base_prompt}\nPage types: {', '.join(e for e in self.get_elements() if e != 'toc')}"     
-        llm: GPT = GPT(system_prompt, self.get_api_key(), self.get_model())
+        llm: GPT = GPT(system_prompt, self.get_api_key(), self.get_model(), self.get_concurrency())
         additional_system_prompt: str = "Which of the following page names best matches the given type? Return only the exact page name." 
-        llm_additional: GPT = GPT(additional_system_prompt, self.get_api_key(), self.get_model())
+        llm_additional: GPT = GPT(additional_system_prompt, self.get_api_key(), self.get_model(), self.get_concurrency())
         return (llm, llm_additional)
 
-    def check(self):
+    def get_task_name(self) -> Optional[str]:
+        return "page_type"
+
+    def get_task_schema(self) -> Any:
+        return Optional[str]
+
+    def format_task_response(self, value: Any) -> Optional[str]:
+        return str(value)
+
+    def is_first_window_only(self) -> bool:
+        return True
+
+    def get_page_requests(self) -> List[PageRequest]:
+        return [PageRequest(page, f"\nPage name: {page.get_name()}", "\nPage content:\n") for page in self.get_ig().get_pages()]
+
+    def check_responses(self, requests: List[PageRequest], page_responses: List[List[Optional[str]]]) -> List[Check]:
         checks: List[Check] = []
         results: Dict[str, List] = {elem: [] for elem in self.get_elements()}
-        for page in self.get_ig().get_pages():
-            user_prompt: str = f"\nPage name: {page.get_name()}\nPage content:\n{page.get_text()}"
-            response: Optional[str] = self.get_llm().openai_chat_completion_response(user_prompt)
+        for request, responses in zip(requests, page_responses):
+            page: Page = request.get_page()
+            response: Optional[str] = responses[0] if responses else None
             if response:
                 response_clean: str = response.lower().strip()
                 if response_clean in self.get_elements():
@@ -334,40 +488,40 @@ class PageTypeChecker(LLMChecker):
         for elem in self.get_elements():
             response_bool: bool = False
             value: bool = False
-            proof: str = ""
+            proof: Optional[Proof] = None
             pages: List = []
             if elem == "toc":
                 if self.get_ig().get_toc_path():
                     response_bool = True
                     value = True
-                    proof = f"Page: {self.get_ig().get_toc_path().name}"
+                    proof = Proof(f"Page: {self.get_ig().get_toc_path().name}")
             else:
                 pages = results[elem]
                 if len(pages) == 1:
                     response_bool = True
                     value = True
-                    proof = "Page: " + pages[0]
+                    proof = Proof("Page: " + pages[0])
                 elif len(pages) > 1:
                     additional_user_prompt: str = f"\nSearched type: {elem}\nProposed page names: {str(pages)}"
                     response_additional: Optional[str] = self.get_llm_additional().openai_chat_completion_response(additional_user_prompt) #type: ignore
                     if response_additional:
                         response_additional_clean: str = response_additional.lower().strip()
-                        for page in pages:
-                            page_base = page.rsplit(".", 1)[0]
-                            if response_additional_clean == page or response_additional_clean == page_base:
+                        for page_name in pages:
+                            page_base = page_name.rsplit(".", 1)[0]
+                            if response_additional_clean == page_name or response_additional_clean == page_base:
                                 response_bool = True
                                 value = True
-                                proof = "Page: " + page
+                                proof = Proof("Page: " + page_name)
                                 break
             if response_bool:
                 checks.append(Check(f"Presence of page: {elem}", value, proof, self.get_domain()))
             else:
-                print(f"PageTypeChecker: type {elem} skipped (LLM error response)")
+                self._print_skipped(f"PageTypeChecker: type {elem} skipped (LLM error response)")
         return checks
 
 
 class TextChecker(LLMChecker):
-    def __init__(self, ig: FHIRIG, model: str, check_references: bool = True):
+    def __init__(self, ig: FHIRIG, model: str, check_references: bool = True, concurrency: int = 1, max_page_tokens: Optional[int] = None, chunk_overlap: int = 200, max_element_tokens: Optional[int] = 2000):
         domain: str = "Writing and narrative"
         elements: List[Tuple[str, str]] = [
             ("prior", "a section that explains key information that needs to be understood prior to reading the IG"),
@@ -380,8 +534,14 @@ class TextChecker(LLMChecker):
             ("resources_examples", "explicit reference within the narrative text to concrete FHIR example resources demonstrating how to use the IG in practice (not just a dedicated 'Examples' section)"),
             ("queries_examples", "concrete example queries that illustrate how to interact with or search for resources related to the IG, when applicable")
         ]
-        super().__init__(ig, domain, elements, model)
+        super().__init__(ig, domain, elements, model, concurrency, max_page_tokens, chunk_overlap)
         self._check_references: bool = check_references
+        self._max_element_tokens: Optional[int] = max_element_tokens
+        self._reference_elements: Optional[Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]] = None
+        self._reference_artifacts: Optional[Dict[str, Artifact]] = None
+
+    def get_max_element_tokens(self) -> Optional[int]:
+        return self._max_element_tokens
 
     def _set_llm(self):
         system_prompt: str = """
@@ -400,15 +560,18 @@ class TextChecker(LLMChecker):
         - Output only valid JSON.
         - The excerpt must be taken directly from the page text without any modifications, paraphrasing, or additions.
         """ 
-        llm: GPT = GPT(textwrap.dedent(system_prompt), self.get_api_key(), self.get_model())
+        llm: GPT = GPT(textwrap.dedent(system_prompt), self.get_api_key(), self.get_model(), self.get_concurrency())
         return (llm, None)
 
-    def check(self):
-        checks: List[Check] = []
-        all_elements: List = [self.get_elements()]
+    def get_task_name(self) -> Optional[str]:
+        return "elements"
 
-        if self._check_references:
-            profiles: List[Artifact] = [artifact for artifact in self.get_ig().get_artifacts_type("StructureDefinition") if artifact.get_content().get("kind") == "resource"]
+    def get_task_schema(self) -> Any:
+        return TextCheckResponses
+
+    def _get_reference_elements(self) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        if self._reference_elements is None:
+            profiles: List[Artifact] = self.get_ig().get_profiles()
             profiles_str: List[Tuple] = []
             for profile in profiles:
                 profile_name = profile.get_content().get("name")
@@ -426,46 +589,90 @@ class TextChecker(LLMChecker):
                 else:
                     sps_str.append((sp.get_id(), sp.get_id()))
             sps_elements: List[Tuple[str, str]] = [(s[0], f"a reference to the search parameter {s[1]}") for s in sps_str]
-            all_elements.extend([profiles_elements, sps_elements])
-
-        all_elements_flat: List[Tuple[str, str]] = [e for sub_elements in all_elements for e in sub_elements]
-        results: Dict[str, List] = {elem[0]: [] for elem in all_elements_flat}
-        for elements in all_elements:
-            if len(elements) > 0:
-                for page in self.get_ig().get_pages():
-                    if page.get_name() not in ["artifacts.html", "toc.html", "issues.html"]:
-                        response_bool: bool = False
-                        select_elements: str =  "\n* ".join(f"{k}: {v}" for k, v in elements)
-                        user_prompt: str = f"\nElements:\n* {select_elements}\nPage content: {page.get_text()}"
-                        response: Optional[str] = self.get_llm().openai_chat_completion_response(user_prompt, TextCheckResponses.get_response_format("responses"))
-                        if response:
-                            try:
-                                response_json = json.loads(response)
-                            except:
-                                continue
-                            if "responses" in response_json.keys():
-                                response_json = response_json.get("responses")
-                            if isinstance(response_json, list):
-                                for elem_response in response_json:
-                                    if all(k in elem_response.keys() for k in ["id", "extract"]):
-                                        response_bool = True
-                                        id: str = elem_response.get("id")
-                                        extract: Optional[str] = elem_response.get("extract")
-                                        if extract:
-                                            if id in results.keys():
-                                                if extract.lower().strip() not in ["none", "null"]:
-                                                    results[id].append((page.get_name(), f"\"{extract}\""))
-                                            else:
-                                                response_bool = False
-                        if not response_bool:
-                            print(f"TextChecker: page {page.get_name()} skipped (LLM error response)")
+            self._reference_elements = (profiles_elements, sps_elements)
+        return self._reference_elements
+
+    def _get_reference_artifacts(self) -> Dict[str, Artifact]:
+        if self._reference_artifacts is None:
+            artifacts: List[Artifact] = self.get_ig().get_profiles() + self.get_ig().get_artifacts_type("SearchParameter")
+            self._reference_artifacts = {artifact.get_id(): artifact for artifact in artifacts}
+        return self._reference_artifacts
+
+    def _is_checked_page(self, page: Page) -> bool:
+        return page.get_name() not in ["artifacts.html", "toc.html", "issues.html"]
+
+    def prefilter_page(self, page: Page) -> Dict[str, Tuple[Optional[bool], Optional[str]]]:
+        if not self._check_references:
+            return {}
+        index: ReferenceIndex = self.get_ig().get_reference_index()
+        return {element_id: find_artifact_reference(index, artifact, page) for element_id, artifact in self._get_reference_artifacts().items()}
+
+    def _get_all_elements(self) -> List[Tuple[str, str]]:
+        all_elements: List = [self.get_elements()]
+        if self._check_references:
+            all_elements.extend(self._get_reference_elements())
+        return [e for sub_elements in all_elements for e in sub_elements]
+
+    def get_page_requests(self) -> List[PageRequest]:
+        requests: List[PageRequest] = []
+        all_elements: List[Tuple[str, str]] = self._get_all_elements()
+        packed: Dict[Tuple[str, ...], List[List[str]]] = {}
+        for page in self.get_ig().get_pages():
+            if self._is_checked_page(page):
+                decisions: Dict[str, Tuple[Optional[bool], Optional[str]]] = self.get_prefilter(page)
+                elements: Tuple[str, ...] = tuple(f"{k}: {v}" for k, v in all_elements if decisions.get(k, (None, None))[0] is None)
+                if elements not in packed:
+                    packed[elements] = pack_texts(list(elements), self.get_max_element_tokens(), self.get_model())
+                for elements_batch in packed[elements]:
+                    select_elements: str =  "\n* ".join(elements_batch)
+                    user_prompt: str = f"\nElements:\n* {select_elements}"
+                    requests.append(PageRequest(page, user_prompt, "\nPage content: ", TextCheckResponses.get_response_format("responses")))
+        return requests
+
+    def check_responses(self, requests: List[PageRequest], page_responses: List[List[Optional[str]]]) -> List[Check]:
+        checks: List[Check] = []
+        results: Dict[str, List] = {elem[0]: [] for elem in self._get_all_elements()}
+        for element_page in self.get_ig().get_pages():
+            if self._is_checked_page(element_page):
+                for element_id, (decision, evidence) in self.get_prefilter(element_page).items():
+                    if decision and element_id in results and (element_page.get_name(), f"\"{evidence}\"") not in results[element_id]:
+                        results[element_id].append((element_page.get_name(), f"\"{evidence}\""))
+        for request, responses in zip(requests, page_responses):
+            page: Page = request.get_page()
+            page_bool: bool = False
+            invalid_json: int = 0
+            for response in responses:
+                response_bool: bool = False
+                if response:
+                    try:
+                        response_json = json.loads(response)
+                    except:
+                        invalid_json += 1
+                        continue
+                    if "responses" in response_json.keys():
+                        response_json = response_json.get("responses")
+                    if isinstance(response_json, list):
+                        for elem_response in response_json:
+                            if all(k in elem_response.keys() for k in ["id", "extract"]):
+                                response_bool = True
+                                id: str = elem_response.get("id")
+                                extract: Optional[str] = elem_response.get("extract")
+                                if extract:
+                                    if id in results.keys():
+                                        if extract.lower().strip() not in ["none", "null"] and (page.get_name(), f"\"{extract}\"") not in results[id]:
+                                            results[id].append((page.get_name(), f"\"{extract}\""))
+                                    else:
+                                        response_bool = False
+                page_bool = page_bool or response_bool
+            if not page_bool and invalid_json < len(responses):
+                self._print_skipped(f"TextChecker: page {page.get_name()} skipped (LLM error response)")
 
         for id, elem in self.get_elements():
             value: Optional[bool] = None
-            proof: Optional[str] = None
+            proof: Optional[Proof] = None
             result: List = [r for r in results[id] if r[1]]
             if id == "ms" and not self.get_ig().get_mustSupport():
-                proof = "mustSupport not used."
+                proof = Proof("mustSupport not used.")
             elif bool(result):
                 value = True
                 proof = self._format_proof("Extract per page", result)
@@ -473,12 +680,13 @@ class TextChecker(LLMChecker):
                 value = False
             checks.append(Check(f"Presence of {elem}: ", value, proof, self.get_domain()))
         if self._check_references:
+            profiles_elements, sps_elements = self._get_reference_elements()
             for name, artifacts_elements in {"profile": profiles_elements, "search parameter": sps_elements}.items():
                 value_artifacts: Optional[bool] = True
-                proof_artifacts: Optional[str] = None
+                proof_artifacts: Optional[Proof] = None
                 if len(artifacts_elements) == 0:
                     value_artifacts = None
-                    proof_artifacts = f"No artifact of type {name}"
+                    proof_artifacts = Proof(f"No artifact of type {name}")
                 else:
                     result_artifacts: Dict[str, List] = {"ok": [], "ko": []}
                     for id, _ in artifacts_elements:
@@ -495,10 +703,10 @@ class TextChecker(LLMChecker):
     
 
 class AmbiguousWordingChecker(LLMChecker):
-    def __init__(self, ig: FHIRIG, model: str):
+    def __init__(self, ig: FHIRIG, model: str, concurrency: int = 1, max_page_tokens: Optional[int] = None, chunk_overlap: int = 200):
         domain: str = "Writing and narrative"
         elements: List = []
-        super().__init__(ig, domain, elements, model) 
+        super().__init__(ig, domain, elements, model, concurrency, max_page_tokens, chunk_overlap) 
 
     def _set_llm(self):
         system_prompt: str = """
@@ -529,28 +737,38 @@ class AmbiguousWordingChecker(LLMChecker):
         - The excerpt must be taken directly from the page text without any modifications, paraphrasing, or additions.
         - Only return validated, high-impact technical ambiguities
         """
-        llm: GPT = GPT(textwrap.dedent(system_prompt), self.get_api_key(), self.get_model())
+        llm: GPT = GPT(textwrap.dedent(system_prompt), self.get_api_key(), self.get_model(), self.get_concurrency())
         return (llm, None)
     
-    def check(self):
+    def get_task_name(self) -> Optional[str]:
+        return "ambiguities"
+
+    def get_task_schema(self) -> Any:
+        return AmbiguityResponses
+
+    def get_page_requests(self) -> List[PageRequest]:
+        return [PageRequest(page, "", "Page content: ", TextCheckResponses.get_response_format("responses")) for page in self.get_ig().get_pages()]
+
+    def check_responses(self, requests: List[PageRequest], page_responses: List[List[Optional[str]]]) -> List[Check]:
         results: List[Tuple[str, str]] = []
         value: Optional[bool] = None
-        proof: Optional[str] = None
-        for page in self.get_ig().get_pages():
-            page_name = page.get_name()
-            user_prompt: str = f"Page content: {page.get_text()}"
-            response: Optional[str] = self.get_llm().openai_chat_completion_response(user_prompt, TextCheckResponses.get_response_format("responses"))
-            if response:
-                try:
-                    response_json = json.loads(response)
-                except:
-                    continue
-                if "responses" in response_json.keys():
-                    response_json = response_json.get("responses")
-                if isinstance(response_json, list):
-                    for elem_response in response_json:
-                        if all(k in elem_response.keys() for k in ["extract", "reason"]):
-                            results.append((page_name, f"\"{elem_response['extract']}\" ➡️ {elem_response['reason']}"))
+        proof: Optional[Proof] = None
+        for request, responses in zip(requests, page_responses):
+            page_name = request.get_page().get_name()
+            for response in responses:
+                if response:
+                    try:
+                        response_json = json.loads(response)
+                    except:
+                        continue
+                    if "responses" in response_json.keys():
+                        response_json = response_json.get("responses")
+                    if isinstance(response_json, list):
+                        for elem_response in response_json:
+                            if all(k in elem_response.keys() for k in ["extract", "reason"]):
+                                result: Tuple[str, str] = (page_name, f"\"{elem_response['extract']}\" ➡️ {elem_response['reason']}")
+                                if result not in results:
+                                    results.append(result)
         if len(results) > 0:
             value = False
             temp = defaultdict(list)
@@ -559,6 +777,6 @@ class AmbiguousWordingChecker(LLMChecker):
             proof = self._format_proof("Ambiguous or unclear technical formulations", list(temp.items()))
         else:
             value = True
-            proof = "No ambiguous or unclear technical formulations."
+            proof = Proof("No ambiguous or unclear technical formulations.")
         checks: List[Check] = [Check(f"Clarity for technical implementation: ", value, proof, self.get_domain())]
         return checks
\ No newline at end of file
@@ -0,0 +1,131 @@
+from pathlib import Path
+from datetime import datetime
+import hashlib
+import json
+import threading
+from typing import Any, Dict, List, Optional
+
+from veriFHIR.ig.fhir_ig import FHIRIG, Page
+from veriFHIR.ig.report import Check, Proof
+from veriFHIR.llm.response_formats import get_combined_response_format
+
+
+MANIFEST_VERSION: int = 2
+
+
+def _hash(value: Any) -> str:
+    if not isinstance(value, bytes):
+        value = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    return hashlib.sha256(value).hexdigest()
+
+
+def _check_dict(check: Check) -> dict:
+    proof: Optional[Proof] = check.get_proof()
+    return {"name": check.get_name(), "value": check.get_value(), "proof": proof.to_dict() if proof is not None else None, "domain": check.get_domain()}
+
+
+class RunManifest:
+    def __init__(self, ig: FHIRIG, baseline: Optional[dict] = None):
+        self._ig: FHIRIG = ig
+        self._baseline: dict = baseline if baseline is not None else {}
+        if self._baseline and self._baseline.get("version") != MANIFEST_VERSION:
+            raise Exception(f"Unsupported baseline manifest version: {self._baseline.get('version')}.")
+        self._lock: threading.Lock = threading.Lock()
+        self._pages: Dict[str, str] = {}
+        self._artifacts: Optional[Dict[str, str]] = None
+        self._checkers: Dict[str, dict] = {}
+        self._reused: int = 0
+        self._evaluated: int = 0
+
+    @staticmethod
+    def load(path: Path) -> dict:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def get_ig(self) -> FHIRIG:
+        return self._ig
+    def get_reused(self) -> int:
+        return self._reused
+    def get_evaluated(self) -> int:
+        return self._evaluated
+
+    def get_page_hash(self, page: Page) -> str:
+        name: str = str(page.get_path())
+        with self._lock:
+            if name not in self._pages:
+                self._pages[name] = _hash(page.get_text().encode("utf-8"))
+            return self._pages[name]
+
+    def get_artifact_hashes(self) -> Dict[str, str]:
+        with self._lock:
+            if self._artifacts is None:
+                fs = self.get_ig().get_fs()
+                self._artifacts = {f"{a.get_resource_type()}/{a.get_id()}": _hash(fs.read_bytes(a.get_path())) for a in self.get_ig().get_artifacts()}
+            return self._artifacts
+
+    def _get_checker(self, checker: Any) -> dict:
+        return self._checkers.setdefault(type(checker).__name__, {})
+
+    def _get_baseline_checker(self, checker: Any) -> dict:
+        return self._baseline.get("checkers", {}).get(type(checker).__name__, {})
+
+    def get_request_key(self, checker: Any, request: Any, combined_prompt: Optional[str] = None) -> str:
+        mode: List[Optional[str]] = ["combined", combined_prompt] if combined_prompt is not None else ["standalone", checker.get_llm().get_guidelines_prompt()]
+        task_format: Optional[dict] = get_combined_response_format("page_review", {checker.get_task_name(): checker.get_task_schema()}) if combined_prompt is not None else None
+        return _hash([checker.get_model(), mode, request.get_prompt(), request.get_content_prefix(), request.get_response_format(), task_format,
+                      self.get_page_hash(request.get_page()), checker.get_max_page_tokens(), checker.get_chunk_overlap(), checker.is_first_window_only()])
+
+    def get_responses(self, checker: Any, key: str) -> Optional[List[Optional[str]]]:
+        entry: Optional[dict] = self._get_baseline_checker(checker).get("responses", {}).get(key)
+        if entry is None or any(response is None for response in entry["responses"]):
+            with self._lock:
+                self._evaluated += 1
+            return None
+        with self._lock:
+            self._reused += 1
+        return entry["responses"]
+
+    def put_responses(self, checker: Any, key: str, page: Page, responses: List[Optional[str]]):
+        page_hash: str = self.get_page_hash(page)
+        with self._lock:
+            self._get_checker(checker).setdefault("responses", {})[key] = {"page": str(page.get_path()), "page_hash": page_hash, "responses": responses}
+
+    def _get_fingerprint(self, checker: Any) -> str:
+        config: Dict[str, Any] = {k: v for k, v in vars(checker).items() if isinstance(v, (bool, int, float, str, type(None)))}
+        pages: Optional[Dict[str, str]] = {str(page.get_path()): self.get_page_hash(page) for page in self.get_ig().get_pages()} if checker.reads_pages() else None
+        artifacts: Optional[Dict[str, str]] = self.get_artifact_hashes() if checker.reads_artifacts() else None
+        return _hash([type(checker).__name__, config, checker.get_elements(), self.get_ig().get_metadata().get_ig_type(), pages, artifacts])
+
+    def get_checks(self, checker: Any) -> Optional[List[Check]]:
+        entry: dict = self._get_baseline_checker(checker)
+        if "checks" not in entry or entry.get("fingerprint") != self._get_fingerprint(checker):
+            with self._lock:
+                self._evaluated += 1
+            return None
+        with self._lock:
+            self._reused += 1
+        return [Check(check["name"], check["value"], Proof.from_dict(check["proof"]) if check["proof"] is not None else None, check["domain"]) for check in entry["checks"]]
+
+    def put_checks(self, checker: Any, checks: List[Check]):
+        fingerprint: str = self._get_fingerprint(checker)
+        with self._lock:
+            entry: dict = self._get_checker(checker)
+            entry["fingerprint"] = fingerprint
+            entry["checks"] = [_check_dict(check) for check in checks]
+
+    def write(self, path: Path) -> Path:
+        metadata = self.get_ig().get_metadata()
+        for page in self.get_ig().get_pages():
+            self.get_page_hash(page)
+        manifest: dict = {
+            "version": MANIFEST_VERSION,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "ig": {"name": metadata.get_name(), "version": metadata.get_version(), "fhir_version": metadata.get_fhir_version()},
+            "pages": {name: self._pages[name] for name in sorted(self._pages)},
+            "artifacts": self.get_artifact_hashes(),
+            "checkers": self._checkers
+        }
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return Path(path)
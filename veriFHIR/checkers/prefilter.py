@@ -0,0 +1,34 @@
+import re
+from typing import Optional, Tuple
+
+from veriFHIR.ig.fhir_ig import Artifact, ArtifactReference, Page, ReferenceIndex
+from veriFHIR.utils.multi_pattern import normalize_text
+
+
+class PageMatcher:
+    def __init__(self, page: Page):
+        self._page: Page = page
+        self._text: str = normalize_text(page.get_text())
+
+    def get_page(self) -> Page:
+        return self._page
+    def get_text(self) -> str:
+        return self._text
+
+    def mentions(self, term: Optional[str]) -> bool:
+        return bool(term) and normalize_text(term) in self.get_text() #type: ignore
+
+    def search(self, pattern: str) -> bool:
+        return re.search(pattern, self.get_text()) is not None
+
+
+def find_artifact_reference(index: ReferenceIndex, artifact: Artifact, page: Page) -> Tuple[Optional[bool], Optional[str]]:
+    reference: Optional[ArtifactReference] = index.get_reference(artifact, page)
+    if reference is None:
+        return False, None
+    if reference.get_link() is not None:
+        return True, reference.get_link()
+    url: Optional[str] = artifact.get_url()
+    if url and normalize_text(url) in reference.get_exact_terms():
+        return True, url
+    return None, None
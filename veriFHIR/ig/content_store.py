@@ -0,0 +1,57 @@
+from collections import OrderedDict
+import json
+import threading
+from typing import Optional
+
+from veriFHIR.utils.filesystem import IGFileSystem, VirtualPath
+
+
+class ContentStore:
+    def __init__(self, fs: IGFileSystem, max_size: Optional[int] = None):
+        self._fs: IGFileSystem = fs
+        self._max_size: Optional[int] = max_size
+        self._contents: OrderedDict[str, dict] = OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+        self._reads: int = 0
+
+    def __getstate__(self) -> dict:
+        state: dict = self.__dict__.copy()
+        state["_contents"] = OrderedDict()
+        state["_lock"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def get_fs(self) -> IGFileSystem:
+        return self._fs
+    def get_max_size(self) -> Optional[int]:
+        return self._max_size
+    def get_reads(self) -> int:
+        return self._reads
+
+    def get(self, path: VirtualPath) -> dict:
+        key: str = str(path)
+        with self._lock:
+            if key in self._contents:
+                self._contents.move_to_end(key)
+                return self._contents[key]
+        content: dict = self.read(path)
+        self.put(path, content)
+        return content
+
+    def read(self, path: VirtualPath) -> dict:
+        self._reads += 1
+        return json.loads(self.get_fs().read_text(path, 'utf-8-sig'))
+
+    def put(self, path: VirtualPath, content: dict):
+        if self.get_max_size() == 0:
+            return
+        key: str = str(path)
+        with self._lock:
+            self._contents[key] = content
+            self._contents.move_to_end(key)
+            if self.get_max_size() is not None:
+                while len(self._contents) > self.get_max_size(): #type: ignore
+                    self._contents.popitem(last=False)
@@ -1,10 +1,55 @@
 from __future__ import annotations
-from pathlib import Path
+from functools import partial
+from pathlib import Path, PurePosixPath
 import json
-import codecs
-import tarfile
-from bs4 import BeautifulSoup
-from typing import List, Tuple, Dict, Optional
+import re
+import threading
+from typing import List, Dict, Optional, Set, Tuple
+
+from veriFHIR.utils.filesystem import IGFileSystem, open_filesystem
+from veriFHIR.ig.content_store import ContentStore
+from veriFHIR.utils.parallel import parallel_map
+from veriFHIR.utils.json_stream import iter_json_items
+from veriFHIR.ig.page_parsers import ParsedPage, get_parser
+from veriFHIR.utils.multi_pattern import MultiPatternMatcher, normalize_text
+
+
+def _load_artifact_content(fs: IGFileSystem, file: PurePosixPath) -> Optional[dict]:
+    content = json.loads(fs.read_text(file, 'utf-8-sig'))
+    if isinstance(content, dict) and ("id" in content.keys() and "resourceType" in content.keys()):
+        return content
+    return None
+
+
+HEADER_KEYS: Set[str] = {"resourceType", "id", "url", "meta", "kind", "type"}
+CANONICAL_RESOURCE_TYPES: Set[str] = {
+    "ActivityDefinition", "ActorDefinition", "CapabilityStatement", "ChargeItemDefinition", "CodeSystem", "CompartmentDefinition",
+    "ConceptMap", "EventDefinition", "Evidence", "EvidenceVariable", "ExampleScenario", "GraphDefinition", "ImplementationGuide",
+    "Library", "Measure", "MessageDefinition", "NamingSystem", "ObservationDefinition", "OperationDefinition", "PlanDefinition",
+    "Questionnaire", "Requirements", "SearchParameter", "SpecimenDefinition", "StructureDefinition", "StructureMap",
+    "SubscriptionTopic", "TerminologyCapabilities", "TestScript", "ValueSet"
+}
+
+
+def _probe_artifact(fs: IGFileSystem, file: PurePosixPath) -> Optional[dict]:
+    header: dict = {}
+    with fs.open(file) as f:
+        for key, value in iter_json_items(f):
+            if key not in HEADER_KEYS:
+                continue
+            header[key] = value
+            if "resourceType" not in header:
+                continue
+            expected: List[str] = ["id", "meta"]
+            if header["resourceType"] in CANONICAL_RESOURCE_TYPES:
+                expected.append("url")
+            if header["resourceType"] == "StructureDefinition":
+                expected.extend(["kind", "type"])
+            if all(k in header for k in expected):
+                break
+    if "id" in header.keys() and "resourceType" in header.keys():
+        return header
+    return None
 
 
 class Metadata:
@@ -30,45 +75,58 @@ class Metadata:
         return self._version
 
     def _load_metadata(self, IG: FHIRIG):
-        file_path: Path
+        fs: IGFileSystem = IG.get_fs()
+        file_path: PurePosixPath
         contents: dict
-        if Path(IG.get_path(), "site").exists():
+        if fs.exists(PurePosixPath(IG.get_path(), "site")):
             self._set_ig_type("IGPublisher")
-            file_path = Path(IG.get_path(), "site", "package.manifest.json")
-            contents = json.load(codecs.open(str(file_path), 'r', 'utf-8-sig'))
+            file_path = PurePosixPath(IG.get_path(), "site", "package.manifest.json")
+            contents = json.loads(fs.read_text(file_path, 'utf-8-sig'))
             self._set_fhir_version(contents['fhirVersion'][0])
-            if Path(IG.get_path(), "site", "en").exists():
-                IG.set_path(Path(IG.get_path(), "site", "en"))
+            if fs.exists(PurePosixPath(IG.get_path(), "site", "en")):
+                IG.set_path(PurePosixPath(IG.get_path(), "site", "en"))
             else:
-                IG.set_path(Path(IG.get_path(), "site"))
+                IG.set_path(PurePosixPath(IG.get_path(), "site"))
         else:
             self._set_ig_type("Simplifier")
-            package_path: Path = Path(IG.get_path(), "packages")
-            package_zip: Path = next(Path(package_path).iterdir())
-            with tarfile.open(Path(package_path, package_zip), "r:gz") as tar_ref:
-                tar_ref.extractall(package_path)
-            file_path = Path(package_path, 'package', 'package.json')
-            contents = json.load(codecs.open(str(file_path), 'r', 'utf-8-sig'))
+            package_path: PurePosixPath = PurePosixPath(IG.get_path(), "packages")
+            package_files: List[PurePosixPath] = fs.list_files(package_path)
+            if len(package_files) == 0:
+                raise Exception("IG package not found.")
+            package_json: bytes = fs.read_tar_member(package_files[0], "package/package.json")
+            contents = json.loads(package_json.decode('utf-8-sig'))
             self._set_fhir_version(contents['fhir-version-list'][0])
         self._set_name(contents["name"])
         self._set_version(contents["version"])
 
 
 class Artifact:
-    def __init__(self, id: str, resource_type: str, path: Path):
+    def __init__(self, id: str, resource_type: str, path: PurePosixPath, store: ContentStore, header: Optional[dict] = None):
         self._id: str = id
         self._resource_type: str = resource_type
-        self._path: Path = path
+        self._path: PurePosixPath = path
+        self._store: ContentStore = store
+        self._header: dict = header if header is not None else {}
 
     def get_id(self) -> str:
         return self._id
     def get_resource_type(self) -> str:
         return self._resource_type
-    def get_path(self) -> Path:
+    def get_path(self) -> PurePosixPath:
         return self._path
+    def get_store(self) -> ContentStore:
+        return self._store
+    def get_url(self) -> Optional[str]:
+        return self._header.get("url")
+    def get_kind(self) -> Optional[str]:
+        return self._header.get("kind")
+    def get_type(self) -> Optional[str]:
+        return self._header.get("type")
+    def get_meta_profiles(self) -> List[str]:
+        return self._header.get("profiles", [])
     
     def get_content(self) -> dict:
-        content = json.load(codecs.open(str(self.get_path()), 'r', 'utf-8-sig'))
+        content = self.get_store().get(self.get_path())
         return content
 
     def get_mustSupport_elements(self) -> List[str]:
@@ -87,12 +145,14 @@ class Artifact:
 
 
 class Page:
-    def __init__(self, path: Path, name: str):
-        self._path: Path = path
+    def __init__(self, path: PurePosixPath, name: str, fs: IGFileSystem, parsed: Optional[ParsedPage] = None, parser: str = "html.parser"):
+        self._path: PurePosixPath = path
         self._name: str = name
-        self._text, self._links = self._parse_page()
+        self._fs: IGFileSystem = fs
+        self._parser: str = parser
+        self._text, self._links = parsed if parsed is not None else self._parse_page()
 
-    def get_path(self) -> Path:
+    def get_path(self) -> PurePosixPath:
         return self._path
     def get_name(self) -> str:
         return self._name
@@ -100,97 +160,263 @@ class Page:
         return self._text
     def get_links(self) -> Dict[str, str]:
         return self._links
+    def get_parser(self) -> str:
+        return self._parser
+
+    def _parse_page(self) -> ParsedPage:
+        contents: str = self._fs.read_text(self.get_path(), "utf8")
+        return get_parser(self.get_parser())(contents)
+
+
+def link_target(href: str) -> str:
+    return re.split(r"[?#]", href, 1)[0].rsplit("/", 1)[-1].lower()
+
+
+class ArtifactReference:
+    def __init__(self, page: Page):
+        self._page: Page = page
+        self._link: Optional[str] = None
+        self._terms: Set[str] = set()
+        self._exact_terms: Set[str] = set()
+
+    def get_page(self) -> Page:
+        return self._page
+    def get_link(self) -> Optional[str]:
+        return self._link
+    def get_terms(self) -> Set[str]:
+        return self._terms
+    def get_exact_terms(self) -> Set[str]:
+        return self._exact_terms
+
+    def set_link(self, link: str):
+        if self._link is None:
+            self._link = link
+
+    def add_term(self, term: str, exact: bool):
+        self._terms.add(term)
+        if exact:
+            self._exact_terms.add(term)
 
-    def _parse_page(self) -> Tuple[str, Dict[str, str]]:
-        with open(Path(self.get_path()), 'r', encoding="utf8") as f:
-            contents: str = f.read()
-        soup: BeautifulSoup = BeautifulSoup(contents, 'html.parser')
-        links: Dict[str, str] = {str(a["href"]): a.get_text(strip=True) for a in soup.find_all("a", href=True)}
-        return soup.get_text(), links
+
+class ReferenceIndex:
+    def __init__(self, artifacts: List[Artifact], pages: List[Page]):
+        self._references: Dict[str, Dict[str, ArtifactReference]] = {}
+        self._links: Dict[str, List[Tuple[Page, str, str]]] = {}
+        patterns: Dict[str, List[str]] = {}
+        targets: Dict[str, List[str]] = {}
+        for artifact in artifacts:
+            key: str = self.get_key(artifact)
+            content: dict = artifact.get_content()
+            for term in [artifact.get_id(), artifact.get_url(), content.get("name"), content.get("title")]:
+                if isinstance(term, str) and normalize_text(term):
+                    patterns.setdefault(normalize_text(term), []).append(key)
+            targets.setdefault(f"{artifact.get_resource_type()}-{artifact.get_id()}.html".lower(), []).append(key)
+        matcher: MultiPatternMatcher = MultiPatternMatcher(patterns.keys())
+        for page in pages:
+            text: str = normalize_text(page.get_text())
+            for start, pattern in matcher.find(text):
+                exact: bool = self._is_bounded(text, start, start + len(pattern))
+                for key in patterns[pattern]:
+                    self._get_reference(key, page).add_term(pattern, exact)
+            for href, link_text in page.get_links().items():
+                target: str = link_target(href)
+                self._links.setdefault(target, []).append((page, href, link_text))
+                for key in targets.get(target, []):
+                    self._get_reference(key, page).set_link(link_text.strip() or target)
+
+    @staticmethod
+    def get_key(artifact: Artifact) -> str:
+        return f"{artifact.get_resource_type()}/{artifact.get_id()}"
+
+    @staticmethod
+    def _is_bounded(text: str, start: int, end: int) -> bool:
+        before: bool = start == 0 or re.match(r"[\w\-./]", text[start - 1]) is None
+        after: bool = end == len(text) or re.match(r"[\w\-/]", text[end]) is None
+        return before and after
+
+    def _get_reference(self, key: str, page: Page) -> ArtifactReference:
+        references: Dict[str, ArtifactReference] = self._references.setdefault(key, {})
+        path: str = str(page.get_path())
+        if path not in references:
+            references[path] = ArtifactReference(page)
+        return references[path]
+
+    def get_references(self, artifact: Artifact) -> List[ArtifactReference]:
+        return list(self._references.get(self.get_key(artifact), {}).values())
+
+    def get_reference(self, artifact: Artifact, page: Page) -> Optional[ArtifactReference]:
+        return self._references.get(self.get_key(artifact), {}).get(str(page.get_path()))
+
+    def get_referenced_pages(self, artifact: Artifact) -> List[Page]:
+        return [reference.get_page() for reference in self.get_references(artifact) if reference.get_link() is not None or reference.get_exact_terms()]
+
+    def get_links(self, target: str) -> List[Tuple[Page, str, str]]:
+        return self._links.get(target.lower(), [])
 
 
 class FHIRIG():
-    def __init__(self, ig_path: Path):
-        self._path: Path = ig_path
+    def __init__(self, ig_path: Path, cache_size: Optional[int] = None, workers: Optional[int] = None, probe_artifacts: bool = False, parser: str = "html.parser"):
+        self._fs: IGFileSystem = open_filesystem(ig_path)
+        self._store: ContentStore = ContentStore(self._fs, cache_size)
+        self._workers: Optional[int] = workers
+        self._probe_artifacts: bool = probe_artifacts
+        self._parser: str = parser
+        self._path: PurePosixPath = PurePosixPath()
         self._metadata: Metadata = Metadata(self)
-        self._toc_path: Path = self._find_toc_path()
+        self._toc_path: PurePosixPath = self._find_toc_path()
         self._pages: List[Page] = self._load_pages()
         self._artifacts: List[Artifact] = self._load_artifacts()
-        self._mustSupport: bool = self._check_mustSupport()
+        self._artifacts_by_type: Dict[str, List[Artifact]] = {}
+        self._artifacts_by_url: Dict[str, Artifact] = {}
+        self._examples_by_profile: Dict[str, List[Artifact]] = {}
+        self._index_artifacts()
+        self._mustSupport: Optional[bool] = None
+        self._lock: threading.Lock = threading.Lock()
+        self._reference_index: Optional[ReferenceIndex] = None
+
+    def __getstate__(self) -> dict:
+        state: dict = self.__dict__.copy()
+        state["_lock"] = None
+        state["_reference_index"] = None
+        return state
 
-    def set_path(self, path: Path):
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def set_path(self, path: PurePosixPath):
         self._path = path
 
-    def get_path(self) -> Path:
+    def get_fs(self) -> IGFileSystem:
+        return self._fs
+    def get_store(self) -> ContentStore:
+        return self._store
+    def get_workers(self) -> Optional[int]:
+        return self._workers
+    def get_parser(self) -> str:
+        return self._parser
+    def get_path(self) -> PurePosixPath:
         return self._path
     def get_metadata(self) -> Metadata:
         return self._metadata
-    def get_toc_path(self) -> Path:
+    def get_toc_path(self) -> PurePosixPath:
         return self._toc_path
     def get_pages(self) -> List[Page]:
         return self._pages
     def get_artifacts(self) -> List[Artifact]:
         return self._artifacts
     def get_artifacts_type(self, type: str) -> List[Artifact]:
-        return [artifact for artifact in self.get_artifacts() if artifact.get_resource_type() == type]
+        return self._artifacts_by_type.get(type, [])
+    def get_artifact_url(self, url: str) -> Optional[Artifact]:
+        return self._artifacts_by_url.get(url)
+    def get_examples(self, profile_url: str) -> List[Artifact]:
+        return self._examples_by_profile.get(profile_url, [])
+    def get_profiles(self) -> List[Artifact]:
+        return [artifact for artifact in self.get_artifacts_type("StructureDefinition") if artifact.get_kind() == "resource"]
     def get_mustSupport(self) -> bool:
-        return self._mustSupport
+        with self._lock:
+            if self._mustSupport is None:
+                self._mustSupport = self._check_mustSupport()
+            return self._mustSupport
+
+    def get_reference_index(self) -> ReferenceIndex:
+        with self._lock:
+            if self._reference_index is None:
+                self._reference_index = ReferenceIndex(self.get_profiles() + self.get_artifacts_type("SearchParameter"), self.get_pages())
+            return self._reference_index
 
-    def _find_toc_path(self) -> Path:
-        toc_path: Path
+    def close(self):
+        self.get_fs().close()
+
+    def _find_toc_path(self) -> PurePosixPath:
+        toc_path: PurePosixPath
         if self.get_metadata().get_ig_type() == "IGPublisher":
-            toc_path = Path(self.get_path(), "toc.html")
+            toc_path = PurePosixPath(self.get_path(), "toc.html")
         else:
-            toc_path = Path(self.get_path(), "Home.html")
-        if toc_path.exists():
+            toc_path = PurePosixPath(self.get_path(), "Home.html")
+        if self.get_fs().is_file(toc_path):
             return toc_path
         else:
             raise Exception("IG toc page not found.")
         
     def _load_pages(self) -> List[Page]:
-        pages: List[Page] = []
-        with open(self.get_toc_path(), 'r' ,encoding="utf8") as f:
-            contents: str = f.read()
-        soup: BeautifulSoup = BeautifulSoup(contents, "html.parser")
-        for a in soup.find_all("a", href=True):
-            link = a.get("href")
+        links: List[str] = []
+        parse = get_parser(self.get_parser())
+        contents: str = self.get_fs().read_text(self.get_toc_path(), "utf8")
+        toc_parsed: ParsedPage = parse(contents)
+        for link in toc_parsed[1].keys():
             add: bool = True
             if isinstance(link, str) and link.endswith(".html"):
-                if Path(self.get_path(), link).exists():
+                if self.get_fs().is_file(PurePosixPath(self.get_path(), link)):
                     if self.get_metadata().get_ig_type() == "IGPublisher":
-                        if Path(self.get_path(), link.replace(".html", ".json")).exists():
+                        if self.get_fs().exists(PurePosixPath(self.get_path(), link.replace(".html", ".json"))):
                             add = False
                     else:
                         if "artifact" in link.lower():
                             add = False
-                    if add and link not in [page.get_name() for page in pages]:
-                        pages.append(Page(Path(self.get_path(), link), link))
-        if len(pages) == 0:
+                    if add and link not in links:
+                        links.append(link)
+        if len(links) == 0:
             raise Exception("No pages found.")
-        if len(pages) > 50:
-            raise Exception(f"Too many narrative pages ({len(pages)}) in the IG.") 
-        return pages
+        if len(links) > 50:
+            raise Exception(f"Too many narrative pages ({len(links)}) in the IG.") 
+        paths: List[PurePosixPath] = [PurePosixPath(self.get_path(), link) for link in links]
+        to_parse: List[PurePosixPath] = [path for path in paths if path != self.get_toc_path()]
+        pages_contents: List[str] = parallel_map(lambda path: self.get_fs().read_text(path, "utf8"), to_parse, self.get_workers())
+        pages_parsed: Dict[PurePosixPath, ParsedPage] = dict(zip(to_parse, parallel_map(parse, pages_contents, self.get_workers(), processes=True)))
+        pages_parsed[self.get_toc_path()] = toc_parsed
+        return [Page(path, link, self.get_fs(), pages_parsed[path], self.get_parser()) for path, link in zip(paths, links)]
     
 
     def _load_artifacts(self) -> List[Artifact]:
         artifacts: List[Artifact] = []
+        fs: IGFileSystem = self.get_fs()
+        store: ContentStore = self.get_store()
+        files: List[PurePosixPath] = []
         if self.get_metadata().get_ig_type() == "IGPublisher":
-            for file in self.get_path().glob("*.json"):
-                content = json.load(codecs.open(str(file), 'r', 'utf-8-sig'))
-                if isinstance(content, dict) and ("id" in content.keys() and "resourceType" in content.keys()):
-                    artifacts.append(Artifact(content["id"], content["resourceType"], file))
+            files = fs.glob(self.get_path(), "*.json")
+        else:
+            artifacts_path: PurePosixPath = PurePosixPath(self.get_path(), "artifacts")
+            if fs.exists(artifacts_path):
+                files = fs.glob(artifacts_path, "*.json")
+        if self._probe_artifacts:
+            headers: List[Optional[dict]] = parallel_map(partial(_probe_artifact, fs), files, self.get_workers(), processes=True)
+            for file, header in zip(files, headers):
+                if header is not None:
+                    artifacts.append(Artifact(header["id"], header["resourceType"], file, store, self._read_header(header)))
+            return artifacts
+        if self.get_workers() and self.get_workers() > 1: #type: ignore
+            contents: List[Optional[dict]] = parallel_map(partial(_load_artifact_content, fs), files, self.get_workers(), processes=True)
         else:
-            artifacts_path: Path = Path(self.get_path(), "artifacts")
-            if artifacts_path.exists():
-                for file in artifacts_path.glob("*.json"):
-                    content = json.load(codecs.open(str(file), 'r', 'utf-8-sig'))
-                    if isinstance(content, dict) and ("id" in content.keys() and "resourceType" in content.keys()):
-                        artifacts.append(Artifact(content["id"], content["resourceType"], file))
+            contents = [store.read(file) for file in files]
+        for file, content in zip(files, contents):
+            if isinstance(content, dict) and ("id" in content.keys() and "resourceType" in content.keys()):
+                store.put(file, content)
+                artifacts.append(Artifact(content["id"], content["resourceType"], file, store, self._read_header(content)))
         return artifacts
+
+    def _read_header(self, content: dict) -> dict:
+        header: dict = {}
+        for key in ["url", "kind", "type"]:
+            if isinstance(content.get(key), str):
+                header[key] = content[key]
+        meta = content.get("meta")
+        profiles = meta.get("profile") if isinstance(meta, dict) else None
+        header["profiles"] = [profile for profile in profiles if isinstance(profile, str)] if isinstance(profiles, list) else []
+        return header
+
+    def _index_artifacts(self):
+        for artifact in self.get_artifacts():
+            self._artifacts_by_type.setdefault(artifact.get_resource_type(), []).append(artifact)
+            url: Optional[str] = artifact.get_url()
+            if url and url not in self._artifacts_by_url:
+                self._artifacts_by_url[url] = artifact
+            for profile_url in set(artifact.get_meta_profiles()):
+                self._examples_by_profile.setdefault(profile_url, []).append(artifact)
     
     def _check_mustSupport(self) -> bool:
         mustSupport: bool = False
-        for artifact in self.get_artifacts():
+        for artifact in self.get_artifacts_type("StructureDefinition"):
             mustSupport_elements: List[str] = artifact.get_mustSupport_elements()
             if len(mustSupport_elements) > 0:
                 mustSupport = True
@@ -0,0 +1,162 @@
+from abc import abstractmethod
+from pathlib import Path, PurePosixPath
+import csv
+from functools import partial
+import json
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+    parquet = None
+
+from veriFHIR.ig.fhir_ig import FHIRIG, Artifact
+from veriFHIR.utils.filesystem import IGFileSystem
+from veriFHIR.utils.parallel import parallel_imap
+
+
+OBLIGATION_URL: str = "http://hl7.org/fhir/StructureDefinition/obligation"
+OBLIGATION_FIELDS: List[str] = ["profile", "path", "slice", "code", "actor"]
+OBLIGATION_FORMATS: List[str] = ["csv", "sqlite", "parquet"]
+WRITE_BATCH_SIZE: int = 10000
+
+def _extract_obligations(fs: IGFileSystem, obligation_url: str, profile: Tuple[str, PurePosixPath]) -> List[dict]:
+    profile_id, path = profile
+    data: bytes = fs.read_bytes(path)
+    if obligation_url.encode("utf-8") not in data:
+        return []
+    content: dict = json.loads(data.decode("utf-8-sig"))
+    obligations: List[dict] = []
+    for element in content.get("snapshot", {}).get("element", []):
+        for ext in element.get("extension", []):
+            if ext.get("url") != obligation_url:
+                continue
+            details: Dict[str, Any] = {}
+            for sub_ext in ext.get("extension", []):
+                details[sub_ext.get("url")] = next((v for k, v in sub_ext.items() if k.startswith("value")), None)
+            actor: Optional[str] = details.get("actor")
+            obligations.append({
+                "profile": profile_id,
+                "path": element.get("path"),
+                "slice": element.get("sliceName"),
+                "code": details.get("code"),
+                "actor": actor.split("/")[-1] if actor else None
+            })
+    return obligations
+
+
+def iter_obligations(ig: FHIRIG, obligation_url: str = OBLIGATION_URL, workers: Optional[int] = None) -> Iterator[dict]:
+    profiles: List[Artifact] = ig.get_profiles()
+    items: List[Tuple[str, PurePosixPath]] = [(profile.get_id(), profile.get_path()) for profile in profiles]
+    for obligations in parallel_imap(partial(_extract_obligations, ig.get_fs(), obligation_url), items, workers, processes=True):
+        yield from obligations
+
+
+class ObligationWriter:
+    def __init__(self, path: Path):
+        self._path: Path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def get_path(self) -> Path:
+        return self._path
+
+    @abstractmethod
+    def write(self, row: dict):
+        pass
+
+    @abstractmethod
+    def close(self):
+        pass
+
+
+class CSVObligationWriter(ObligationWriter):
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._file = open(path, mode="w", newline="", encoding="utf-8-sig")
+        self._writer: csv.DictWriter = csv.DictWriter(self._file, fieldnames=OBLIGATION_FIELDS, delimiter=";")
+        self._writer.writeheader()
+
+    def write(self, row: dict):
+        self._writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+
+class SQLiteObligationWriter(ObligationWriter):
+    def __init__(self, path: Path, ig_name: str, ig_version: str):
+        super().__init__(path)
+        self._ig: Dict[str, str] = {"ig": ig_name, "ig_version": ig_version}
+        self._connection: sqlite3.Connection = sqlite3.connect(path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS obligations (ig TEXT NOT NULL, ig_version TEXT NOT NULL, profile TEXT NOT NULL, path TEXT, slice TEXT, code TEXT, actor TEXT)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS obligations_actor ON obligations (actor)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS obligations_code ON obligations (code)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS obligations_ig ON obligations (ig, ig_version)")
+        self._connection.execute("DELETE FROM obligations WHERE ig = :ig AND ig_version = :ig_version", self._ig)
+        self._rows: List[dict] = []
+
+    def write(self, row: dict):
+        self._rows.append({**self._ig, **row})
+        if len(self._rows) >= WRITE_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        self._connection.executemany("INSERT INTO obligations VALUES (:ig, :ig_version, :profile, :path, :slice, :code, :actor)", self._rows)
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        self._connection.commit()
+        self._connection.close()
+
+
+class ParquetObligationWriter(ObligationWriter):
+    def __init__(self, path: Path, ig_name: str, ig_version: str):
+        if pyarrow is None:
+            raise Exception("Parquet output requires the pyarrow package.")
+        super().__init__(path)
+        self._ig: Dict[str, str] = {"ig": ig_name, "ig_version": ig_version}
+        self._schema = pyarrow.schema([(field, pyarrow.string()) for field in ["ig", "ig_version"] + OBLIGATION_FIELDS])
+        self._writer = parquet.ParquetWriter(path, self._schema) #type: ignore
+        self._rows: List[dict] = []
+
+    def write(self, row: dict):
+        self._rows.append({**self._ig, **row})
+        if len(self._rows) >= WRITE_BATCH_SIZE:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_table(pyarrow.Table.from_pylist(self._rows, schema=self._schema)) #type: ignore
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+
+
+def write_obligations(ig: FHIRIG, output_path: Path, formats: List[str], database: Optional[Path] = None,
+                      obligation_url: str = OBLIGATION_URL, workers: Optional[int] = None) -> Dict[str, Path]:
+    name: str = ig.get_metadata().get_name()
+    version: str = ig.get_metadata().get_version()
+    writers: Dict[str, ObligationWriter] = {}
+    try:
+        for format in formats:
+            if format == "csv":
+                writers[format] = CSVObligationWriter(Path(output_path, f"obligations_{name}.csv"))
+            elif format == "sqlite":
+                writers[format] = SQLiteObligationWriter(database or Path(output_path, "obligations.db"), name, version)
+            elif format == "parquet":
+                writers[format] = ParquetObligationWriter(Path(output_path, f"obligations_{name}.parquet"), name, version)
+            else:
+                raise Exception(f"Unknown obligations format: {format}.")
+        for row in iter_obligations(ig, obligation_url, workers):
+            for writer in writers.values():
+                writer.write(row)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return {format: writer.get_path() for format, writer in writers.items()}
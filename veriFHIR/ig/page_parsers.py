@@ -0,0 +1,167 @@
+from html.parser import HTMLParser
+from typing import Callable, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+from bs4.dammit import EntitySubstitution
+
+
+ParsedPage = Tuple[str, Dict[str, str]]
+
+
+def parse_html_parser(contents: str) -> ParsedPage:
+    soup: BeautifulSoup = BeautifulSoup(contents, "html.parser")
+    links: Dict[str, str] = {str(a["href"]): a.get_text(strip=True) for a in soup.find_all("a", href=True)}
+    return soup.get_text(), links
+
+
+class _TextLinksParser(HTMLParser):
+    _ASCII_SPACES: str = "\x20\x0a\x09\x0c\x0d"
+    _EMPTY_ELEMENTS: set = {"area", "base", "br", "col", "embed", "hr", "img", "input", "keygen", "link", "menuitem", "meta", "param", "source", "track", "wbr",
+                            "basefont", "bgsound", "command", "frame", "image", "isindex", "nextid", "spacer"}
+    _PRESERVE_WHITESPACE: set = {"pre", "textarea"}
+    _SKIPPED_CONTAINERS: set = {"style", "script", "template", "rt", "rp"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self._stack: List[str] = []
+        self._closed_empty_elements: List[str] = []
+        self._preserve_depth: int = 0
+        self._containers: List[str] = []
+        self._data: List[str] = []
+        self._text: List[str] = []
+        self._anchors: List[Tuple[str, List[str]]] = []
+        self._open_anchors: List[Tuple[int, List[str]]] = []
+
+    def get_result(self) -> ParsedPage:
+        self._end_data()
+        links: Dict[str, str] = {href: "".join(parts) for href, parts in self._anchors}
+        return "".join(self._text), links
+
+    def _end_data(self, text: bool = True):
+        if not self._data:
+            return
+        data: str = "".join(self._data)
+        self._data = []
+        if self._preserve_depth == 0 and all(c in self._ASCII_SPACES for c in data):
+            data = "\n" if "\n" in data else " "
+        if not text or self._containers:
+            return
+        self._text.append(data)
+        stripped: str = data.strip()
+        if stripped:
+            for _, parts in self._open_anchors:
+                parts.append(stripped)
+
+    def _push(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._stack.append(tag)
+        if tag in self._PRESERVE_WHITESPACE:
+            self._preserve_depth += 1
+        if tag in self._SKIPPED_CONTAINERS:
+            self._containers.append(tag)
+        if tag == "a":
+            href: Optional[str] = None
+            for key, value in attrs:
+                if key == "href":
+                    href = value if value is not None else ""
+            parts: List[str] = []
+            self._open_anchors.append((len(self._stack), parts))
+            if href is not None:
+                self._anchors.append((href, parts))
+
+    def _pop(self):
+        tag: str = self._stack.pop()
+        if tag in self._PRESERVE_WHITESPACE:
+            self._preserve_depth -= 1
+        if tag in self._SKIPPED_CONTAINERS:
+            self._containers.pop()
+        if self._open_anchors and self._open_anchors[-1][0] > len(self._stack):
+            self._open_anchors.pop()
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._end_data()
+        self._push(tag, attrs)
+        if tag in self._EMPTY_ELEMENTS:
+            self._end_data()
+            self._pop()
+            self._closed_empty_elements.append(tag)
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._end_data()
+        self._push(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag: str):
+        if tag in self._closed_empty_elements:
+            self._closed_empty_elements.remove(tag)
+            return
+        self._end_data()
+        if tag in self._stack:
+            while self._stack[-1] != tag:
+                self._pop()
+            self._pop()
+
+    def handle_data(self, data: str):
+        self._data.append(data)
+
+    def handle_charref(self, name: str):
+        if name.startswith("x"):
+            real_name: int = int(name.lstrip("x"), 16)
+        elif name.startswith("X"):
+            real_name = int(name.lstrip("X"), 16)
+        else:
+            real_name = int(name)
+        data: Optional[str] = None
+        if real_name < 256:
+            try:
+                data = bytearray([real_name]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(real_name)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+
+    def handle_entityref(self, name: str):
+        character: Optional[str] = EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+
+    def _handle_special(self, data: str, text: bool = False):
+        self._end_data()
+        self._data.append(data)
+        self._end_data(text)
+
+    def handle_comment(self, data: str):
+        self._handle_special(data)
+
+    def handle_decl(self, decl: str):
+        self._handle_special(decl)
+
+    def unknown_decl(self, data: str):
+        if data.upper().startswith("CDATA["):
+            self._handle_special(data[len("CDATA["):], True)
+        else:
+            self._handle_special(data)
+
+    def handle_pi(self, data: str):
+        self._handle_special(data)
+
+
+def parse_stream(contents: str) -> ParsedPage:
+    parser: _TextLinksParser = _TextLinksParser()
+    parser.feed(contents)
+    parser.close()
+    return parser.get_result()
+
+
+PARSERS: Dict[str, Callable[[str], ParsedPage]] = {
+    "html.parser": parse_html_parser,
+    "stream": parse_stream
+}
+
+
+def get_parser(name: str) -> Callable[[str], ParsedPage]:
+    if name not in PARSERS:
+        raise Exception(f"Unknown HTML parser backend: {name} (available: {', '.join(PARSERS)}).")
+    return PARSERS[name]
@@ -1,28 +1,189 @@
 from __future__ import annotations
 from collections import defaultdict
-from tabulate import tabulate # type: ignore[import-untyped]
-from bs4 import BeautifulSoup
 from pathlib import Path
-from jinja2 import Template
-from datetime import datetime
-from typing import List, DefaultDict, Optional
+from jinja2 import Environment, Template
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, DefaultDict, Optional, TextIO, Tuple, Union
 import base64
+import json
+import re
 
 from veriFHIR.ig.fhir_ig import Metadata
 
 
+REPORT_TEMPLATE: Template = Environment(keep_trailing_newline=True).from_string("""
+        <!DOCTYPE html>
+        <html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
+        <head>
+            <meta charset="utf-8">
+            <title>Quality review report</title>
+            <style>{{ css }}</style>
+        </head>
+        <body>
+            <div class="report-header">
+                <img src="data:image/png;base64,{{ logo_base64 }}" alt="Logo" class="report-logo"/>
+                <div class="report-titles">
+                    <h1 class="report-title">IG quality review report</h1>
+                    <p class="report-meta">Generated {{ date }}, FHIR version {{ fhir_version }} for {{ name }}#{{ version }}</p>
+                </div>
+            </div>
+            <h2 id="quality">Quality review summary</h1>
+            <table class="grid">
+<thead>
+<tr><th>Domain</th><th>Checks (✅/❌)</th></tr>
+</thead>
+<tbody>
+{% for domain, true_count, false_count, true_pct, false_pct in summary_rows -%}
+<tr class="summary-row"><td>{{ domain }}</td><td>
+<div style="display:flex; width:150px; border:1px solid #ccc; border-radius:4px; overflow:hidden;">
+<div style="background-color:green; width:{{ true_pct }}%; color:white; text-align:center;">{{ true_count }}</div>
+<div style="background-color:red; width:{{ false_pct }}%; color:white; text-align:center;">{{ false_count }}</div>
+</div>
+</td></tr>
+{% endfor -%}
+</tbody>
+</table>
+            <h2 id="quality">Quality checks</h1>
+            <p>Inspired by IG Best Practices</a>
+            described in <a href="https://build.fhir.org/ig/FHIR/ig-guidance/best-practice.html">Guidance for FHIR IG Creation</a>
+            and <a href="https://confluence.hl7.org/spaces/FHIR/pages/66930646/FHIR+Implementation+Guide+Publishing+Requirements">FHIR IG Publishing requirements</a></p>
+            <table class="grid">
+<thead>
+<tr><th>Domain</th><th>Criteria</th><th>Check</th><th>Proof</th></tr>
+</thead>
+<tbody>
+{% for row_class, domain, criteria, value, proof in check_rows -%}
+<tr{{ row_class }}><td>{{ domain }}</td><td>{{ criteria }}</td><td class="check-cell">{{ value }}</td><td>{{ proof }}</td></tr>
+{% endfor -%}
+</tbody>
+</table>
+        </body>
+        </html>
+        """)
+
+
+REPORT_FORMATS: List[str] = ["html", "jsonl", "sarif"]
+SARIF_SCHEMA: str = "https://json.schemastore.org/sarif-2.1.0.json"
+TOOL_URI: str = "https://github.com/Kereval35/veriFHIR"
+
+
+def strip_label(label: str) -> str:
+    return re.sub(r"[\s:]+$", "", label.strip())
+
+
+def _check_name(check: Check) -> str:
+    return strip_label(check.get_name())
+
+
+def _rule_id(check: Check) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", _check_name(check).lower()).strip("-")
+
+
+def _write_json_array(f: TextIO, items: Iterator[dict]):
+    f.write("[")
+    for i, item in enumerate(items):
+        f.write(("" if i == 0 else ", ") + json.dumps(item, ensure_ascii=False))
+    f.write("]")
+
+
+def _proof_html(check: Check) -> Optional[str]:
+    proof: Optional[Proof] = check.get_proof()
+    return proof.to_html() if proof is not None else None
+
+
+def _proof_dict(check: Check) -> Optional[dict]:
+    proof: Optional[Proof] = check.get_proof()
+    return proof.to_dict() if proof is not None else None
+
+
+def _html_cell(value: Optional[str]) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("&", "&amp;")
+
+
+ProofItem = Union[str, Tuple[str, Tuple[str, ...]], Tuple[Tuple[str, ...], str]]
+
+
+class Proof:
+    __slots__ = ("_title", "_items", "_reverse")
+
+    def __init__(self, title: str, items: Tuple[ProofItem, ...] = (), reverse: bool = False):
+        self._title: str = title
+        self._items: Tuple[ProofItem, ...] = items
+        self._reverse: bool = reverse
+
+    def get_title(self) -> str:
+        return self._title
+    def get_items(self) -> Tuple[ProofItem, ...]:
+        return self._items
+    def is_reverse(self) -> bool:
+        return self._reverse
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Proof) and (self.get_title(), self.get_items(), self.is_reverse()) == (other.get_title(), other.get_items(), other.is_reverse())
+
+    def __hash__(self) -> int:
+        return hash((self.get_title(), self.get_items(), self.is_reverse()))
+
+    def _item_html(self, item: ProofItem) -> List[str]:
+        if isinstance(item, str):
+            return [f"<li>{item}</li>"]
+        if isinstance(item[0], tuple):
+            values: str = ", ".join(item[0])
+            return [f"<li>{item[1]}: {values}</li>" if self.is_reverse() else f"<li>{values}: {item[1]}</li>"]
+        return ["<li>", f"{item[0]}:", "<ul>", *[f"<li>{sub_item}</li>" for sub_item in item[1]], "</ul>", "</li>"]
+
+    def to_html(self) -> str:
+        if not self.get_items():
+            return self.get_title()
+        lines: List[str] = [f"{self.get_title()}: ", "<ul>"]
+        for item in self.get_items():
+            lines.extend(self._item_html(item))
+        lines.append("</ul>")
+        return "\n".join(lines)
+
+    @staticmethod
+    def item_to_dict(item: ProofItem) -> Any:
+        if isinstance(item, str):
+            return item
+        if isinstance(item[0], tuple):
+            return {"key": item[1], "values": list(item[0])}
+        return {"label": item[0], "items": list(item[1])}
+
+    @staticmethod
+    def item_from_dict(item: Any) -> ProofItem:
+        if isinstance(item, str):
+            return item
+        if "key" in item:
+            return (tuple(item["values"]), item["key"])
+        return (item["label"], tuple(item["items"]))
+
+    def to_dict(self) -> dict:
+        data: dict = {"title": self.get_title(), "items": [Proof.item_to_dict(item) for item in self.get_items()]}
+        if self.is_reverse():
+            data["reverse"] = True
+        return data
+
+    @staticmethod
+    def from_dict(data: dict) -> Proof:
+        return Proof(data["title"], tuple(Proof.item_from_dict(item) for item in data.get("items", [])), data.get("reverse", False))
+
+
 class Check:
-    def __init__(self, name: str, value: Optional[bool], proof: Optional[str], domain: str):
+    __slots__ = ("_name", "_value", "_proof", "_domain")
+
+    def __init__(self, name: str, value: Optional[bool], proof: Optional[Proof], domain: str):
         self._name: str = name
         self._value: Optional[bool] = value
-        self._proof: Optional[str] = proof
+        self._proof: Optional[Proof] = proof
         self._domain: str = domain
 
     def get_name(self) -> str:
         return self._name
     def get_value(self) -> Optional[bool]:
         return self._value
-    def get_proof(self) -> Optional[str]:
+    def get_proof(self) -> Optional[Proof]:
         return self._proof
     def get_domain(self) -> str:
         return self._domain
@@ -37,6 +198,11 @@ class Report:
     def add_checks(self, checks: List[Check]):
         self._checks.extend(checks)
 
+    def count_values(self) -> Tuple[int, int]:
+        passed: int = len([check for check in self.get_checks() if check.get_value()])
+        failed: int = len([check for check in self.get_checks() if check.get_value() == False])
+        return passed, failed
+
     def _count_values(self) -> defaultdict:
         domain_counts: DefaultDict[str, dict[str, int]] = defaultdict(lambda: {"True": 0, "False": 0})
         for check in self.get_checks():
@@ -46,10 +212,8 @@ class Report:
                 domain_counts[check.get_domain()]["False"] += 1
         return domain_counts
 
-    def write(self, output_path: Path, ig_metadata: Metadata):
-        criteria_summary: defaultdict = self._count_values()
-        summary_table_rows: List[List] = []
-        for domain, counts in criteria_summary.items():
+    def _summary_rows(self) -> Iterator[Tuple[str, int, int, int, int]]:
+        for domain, counts in self._count_values().items():
             true_count: int = counts.get("True")
             false_count: int = counts.get("False")
             total: int = true_count + false_count
@@ -58,84 +222,164 @@ class Report:
             if total != 0:
                 true_pct = int(true_count / total * 100)
                 false_pct = int(false_count / total * 100)
-            bar_html: str = f"""
-            <div style="display:flex; width:150px; border:1px solid #ccc; border-radius:4px; overflow:hidden;">
-                <div style="background-color:green; width:{true_pct}%; color:white; text-align:center;">{true_count}</div>
-                <div style="background-color:red; width:{false_pct}%; color:white; text-align:center;">{false_count}</div>
-            </div>
-            """
-            summary_table_rows.append([domain, bar_html])
-        summary_table: str = tabulate(summary_table_rows, tablefmt="html", headers=["Domain", "Checks (✅/❌)"])
-        summary_table_soup: BeautifulSoup = BeautifulSoup(summary_table, "html.parser")
-        for i, sum_row in enumerate(summary_table_rows):
-            tr = summary_table_soup.find_all("tr")[i+1]
-            td_bar = tr.find_all("td")[1]
-            td_bar.clear()
-            td_bar.append(BeautifulSoup(sum_row[1], "html.parser"))
-            tr["class"] = "summary-row"
-        if summary_table_soup.table:
-            summary_table_soup.table["class"] = "grid"
-        checks_dicts: List[dict] = [{"Domain": check.get_domain(), "Criteria": check.get_name(), "Check": check.get_value(), "Proof": check.get_proof()} for check in self.get_checks()]
-        checks_table: str = tabulate(checks_dicts, tablefmt="html", headers="keys")
-        checks_table = checks_table.replace("&lt;", "<").replace("&gt;", ">")
-        checks_table_soup: BeautifulSoup = BeautifulSoup(checks_table, "html.parser")
-        for row in checks_table_soup.find_all("tr")[1:]:
-            value_td = row.find_all("td")[2]
-            if "True" in value_td.text:
-                value_td.string = "✅"
-                row["class"] = "true-check"
-            elif "False" in value_td.text:
-                value_td.string = "❌"
-                row["class"] = "false-check"
-            value_td["class"] = "check-cell"
-        if checks_table_soup.table:
-            checks_table_soup.table["class"] = "grid"
+            yield _html_cell(domain), true_count, false_count, true_pct, false_pct
+
+    def _check_rows(self) -> Iterator[Tuple[str, str, str, str, str]]:
+        for check in self.get_checks():
+            row_class: str = ""
+            value: str = ""
+            if check.get_value():
+                row_class, value = " class=\"true-check\"", "✅"
+            elif check.get_value() == False:
+                row_class, value = " class=\"false-check\"", "❌"
+            yield row_class, _html_cell(check.get_domain()), _html_cell(check.get_name()), value, _html_cell(_proof_html(check))
+
+    def _output_file(self, output_path: Path, ig_metadata: Metadata, now: datetime, extension: str) -> Path:
+        output_file: Path = Path(output_path, f"quality-review_{ig_metadata.get_name()}_{now.strftime('%Y-%m-%d-%H-%M')}.{extension}")
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        return output_file
+
+    def write_formats(self, output_path: Path, ig_metadata: Metadata, formats: List[str]) -> Dict[str, Path]:
+        now: datetime = datetime.now()
+        writers: dict = {"html": self.write, "jsonl": self.write_jsonl, "sarif": self.write_sarif}
+        output_files: Dict[str, Path] = {}
+        for format in formats:
+            if format not in writers:
+                raise Exception(f"Unknown report format: {format}.")
+            output_files[format] = writers[format](output_path, ig_metadata, now)
+        return output_files
+
+    def write_jsonl(self, output_path: Path, ig_metadata: Metadata, now: Optional[datetime] = None) -> Path:
+        output_file: Path = self._output_file(output_path, ig_metadata, now or datetime.now(), "jsonl")
+        ig: dict = {"ig": ig_metadata.get_name(), "ig_version": ig_metadata.get_version(), "fhir_version": ig_metadata.get_fhir_version()}
+        with open(output_file, "w", encoding="utf-8") as f:
+            for check in self.get_checks():
+                record: dict = {**ig, "domain": check.get_domain(), "check": _check_name(check), "value": check.get_value(), "proof": _proof_dict(check)}
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return output_file
+
+    def _sarif_rules(self) -> Iterator[dict]:
+        written: set = set()
+        for check in self.get_checks():
+            rule_id: str = _rule_id(check)
+            if rule_id not in written:
+                written.add(rule_id)
+                yield {"id": rule_id, "name": _check_name(check), "shortDescription": {"text": _check_name(check)}, "properties": {"domain": check.get_domain()}}
+
+    def _sarif_results(self, rules: Dict[str, int]) -> Iterator[dict]:
+        for check in self.get_checks():
+            kind: str = "pass" if check.get_value() else "fail" if check.get_value() == False else "notApplicable"
+            yield {
+                "ruleId": _rule_id(check),
+                "ruleIndex": rules[_rule_id(check)],
+                "kind": kind,
+                "level": "warning" if kind == "fail" else "none",
+                "message": {"text": _check_name(check)},
+                "properties": {"domain": check.get_domain(), "value": check.get_value(), "proof": _proof_dict(check)}
+            }
+
+    def write_sarif(self, output_path: Path, ig_metadata: Metadata, now: Optional[datetime] = None) -> Path:
+        now = now or datetime.now()
+        output_file: Path = self._output_file(output_path, ig_metadata, now, "sarif")
+        rules: Dict[str, int] = {}
+        for check in self.get_checks():
+            rules.setdefault(_rule_id(check), len(rules))
+        run: dict = {
+            "tool": {"driver": {"name": "veriFHIR", "informationUri": TOOL_URI, "rules": "@rules@"}},
+            "results": "@results@",
+            "invocations": [{"executionSuccessful": True, "endTimeUtc": now.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")}],
+            "properties": {"ig": {"name": ig_metadata.get_name(), "version": ig_metadata.get_version(), "fhirVersion": ig_metadata.get_fhir_version()}}
+        }
+        skeleton: str = json.dumps({"$schema": SARIF_SCHEMA, "version": "2.1.0", "runs": [run]}, ensure_ascii=False)
+        head, rest = skeleton.split('"@rules@"', 1)
+        middle, tail = rest.split('"@results@"', 1)
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(head)
+            _write_json_array(f, self._sarif_rules())
+            f.write(middle)
+            _write_json_array(f, self._sarif_results(rules))
+            f.write(tail + "\n")
+        return output_file
+
+    def write(self, output_path: Path, ig_metadata: Metadata, now: Optional[datetime] = None) -> Path:
         css_path: Path = Path("veriFHIR", "config", "report.css")
         with open(css_path, "r", encoding="utf-8") as css_file:
             css_content: str = css_file.read()
         logo_path: Path = Path("veriFHIR.png")
         with open(logo_path, "rb") as img:
             logo_base64: str = base64.b64encode(img.read()).decode("utf-8")
+        now = now or datetime.now()
+        output_file: Path = self._output_file(output_path, ig_metadata, now, "html")
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.writelines(REPORT_TEMPLATE.generate(
+                css = css_content,
+                logo_base64 = logo_base64,
+                date = now.strftime("%A %d %B %Y (%H:%M)"),
+                fhir_version = ig_metadata.get_fhir_version(),
+                name = ig_metadata.get_name(),
+                version = ig_metadata.get_version(),
+                summary_rows = self._summary_rows(),
+                check_rows = self._check_rows()
+            ))
+        return output_file
+
+
+class ReportIndex:
+    def __init__(self):
+        self._entries: List[dict] = []
+
+    def get_entries(self) -> List[dict]:
+        return self._entries
+
+    def add_report(self, file: Path, ig_metadata: Metadata, report: Report, report_file: Path):
+        passed, failed = report.count_values()
+        self._entries.append({"file": file.name, "name": ig_metadata.get_name(), "version": ig_metadata.get_version(), "fhir_version": ig_metadata.get_fhir_version(),
+                              "passed": passed, "failed": failed, "report": report_file, "error": None})
+
+    def add_error(self, file: Path, error: str):
+        self._entries.append({"file": file.name, "name": None, "version": None, "fhir_version": None, "passed": None, "failed": None, "report": None, "error": error})
+
+    def write(self, output_path: Path) -> Path:
+        output_path = Path(output_path)
+        entries: List[dict] = [dict(entry) for entry in sorted(self.get_entries(), key=lambda e: e["file"])]
+        for entry in entries:
+            if entry["report"] is not None:
+                entry["report"] = Path(entry["report"]).resolve().relative_to(output_path.resolve()).as_posix()
+        css_path: Path = Path("veriFHIR", "config", "report.css")
+        with open(css_path, "r", encoding="utf-8") as css_file:
+            css_content: str = css_file.read()
         template_str: str = """
         <!DOCTYPE html>
         <html xmlns="http://www.w3.org/1999/xhtml" xml:lang="en" lang="en">
         <head>
             <meta charset="utf-8">
-            <title>Quality review report</title>
+            <title>Quality review index</title>
             <style>{{ css }}</style>
         </head>
         <body>
-            <div class="report-header">
-                <img src="data:image/png;base64,{{ logo_base64 }}" alt="Logo" class="report-logo"/>
-                <div class="report-titles">
-                    <h1 class="report-title">IG quality review report</h1>
-                    <p class="report-meta">Generated {{ date }}, FHIR version {{ fhir_version }} for {{ name }}#{{ version }}</p>
-                </div>
-            </div>
-            <h2 id="quality">Quality review summary</h1>
-            {{ summary_table | safe }}
-            <h2 id="quality">Quality checks</h1>
-            <p>Inspired by IG Best Practices</a>
-            described in <a href="https://build.fhir.org/ig/FHIR/ig-guidance/best-practice.html">Guidance for FHIR IG Creation</a>
-            and <a href="https://confluence.hl7.org/spaces/FHIR/pages/66930646/FHIR+Implementation+Guide+Publishing+Requirements">FHIR IG Publishing requirements</a></p>
-            {{ criteria_table | safe }}
+            <h1 class="report-title">IG quality review index</h1>
+            <p class="report-meta">Generated {{ date }}, {{ entries | length }} IG(s)</p>
+            <table class="grid">
+                <thead><tr><th>File</th><th>IG</th><th>FHIR version</th><th>Checks (✅/❌)</th><th>Report</th></tr></thead>
+                <tbody>
+                {% for entry in entries %}
+                {% if entry.error %}
+                <tr class="false-check"><td>{{ entry.file }}</td><td colspan="4">Review failed: {{ entry.error }}</td></tr>
+                {% else %}
+                <tr class="summary-row"><td>{{ entry.file }}</td><td>{{ entry.name }}#{{ entry.version }}</td><td>{{ entry.fhir_version }}</td>
+                    <td class="check-cell">{{ entry.passed }} / {{ entry.failed }}</td><td><a href="{{ entry.report }}">{{ entry.report }}</a></td></tr>
+                {% endif %}
+                {% endfor %}
+                </tbody>
+            </table>
         </body>
         </html>
         """
-        template: Template = Template(template_str)
-        now: datetime = datetime.now()
-        html_rendered: str = template.render(
-            css = css_content,
-            logo_base64 = logo_base64,
-            date = now.strftime("%A %d %B %Y (%H:%M)"),
-            fhir_version = ig_metadata.get_fhir_version(),
-            name = ig_metadata.get_name(),
-            version = ig_metadata.get_version(),
-            criteria_table = str(checks_table_soup),
-            summary_table = str(summary_table_soup)
-        )
-        output_file: Path= Path(output_path, f"quality-review_{ig_metadata.get_name()}_{now.strftime('%Y-%m-%d-%H-%M')}.html")
-        output_file.parent.mkdir(parents=True, exist_ok=True)
+        template: Template = Template(template_str, autoescape=True)
+        output_path.mkdir(parents=True, exist_ok=True)
+        output_file: Path = Path(output_path, "index.html")
         with open(output_file, "w", encoding="utf-8") as f:
-            f.write(html_rendered)
+            f.write(template.render(css=css_content, date=datetime.now().strftime("%A %d %B %Y (%H:%M)"), entries=entries))
+        with open(Path(output_path, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
         return output_file
@@ -0,0 +1,146 @@
+from pathlib import Path
+import json
+from typing import Dict, List, Optional, Tuple
+
+from veriFHIR.checkers.manifest import MANIFEST_VERSION, RunManifest
+from veriFHIR.ig.report import Check, Proof, ProofItem, strip_label
+
+
+DIFF_STATUSES: List[str] = ["regression", "improvement", "changed", "added", "removed", "unchanged"]
+
+
+def _proof(data: Optional[dict]) -> Optional[Proof]:
+    return Proof.from_dict(data) if data is not None else None
+
+
+def load_run(path: Path) -> Tuple[dict, List[Check]]:
+    if path.suffix == ".jsonl":
+        ig: dict = {}
+        checks: List[Check] = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record: dict = json.loads(line)
+                    ig = {"name": record.get("ig"), "version": record.get("ig_version"), "fhir_version": record.get("fhir_version")}
+                    checks.append(Check(record["check"], record["value"], _proof(record.get("proof")), record["domain"]))
+        return ig, checks
+    if path.suffix == ".sarif":
+        with open(path, "r", encoding="utf-8") as f:
+            run: dict = json.load(f)["runs"][0]
+        ig_properties: dict = run.get("properties", {}).get("ig", {})
+        ig = {"name": ig_properties.get("name"), "version": ig_properties.get("version"), "fhir_version": ig_properties.get("fhirVersion")}
+        checks = [Check(result["message"]["text"], result["properties"]["value"], _proof(result["properties"].get("proof")), result["properties"]["domain"]) for result in run["results"]]
+        return ig, checks
+    if path.suffix == ".json":
+        manifest: dict = RunManifest.load(path)
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise Exception(f"Unsupported manifest version: {manifest.get('version')}.")
+        checks = [Check(check["name"], check["value"], _proof(check["proof"]), check["domain"]) for entry in manifest["checkers"].values() for check in entry.get("checks", [])]
+        return manifest.get("ig", {}), checks
+    raise Exception(f"Unsupported run file: {path}. Expected a .jsonl or .sarif report or a .json run manifest.")
+
+
+class CheckDiff:
+    def __init__(self, domain: str, name: str, old: Optional[Check], new: Optional[Check]):
+        self._domain: str = domain
+        self._name: str = name
+        self._old: Optional[Check] = old
+        self._new: Optional[Check] = new
+        self._status: str = self._compute_status()
+
+    def get_domain(self) -> str:
+        return self._domain
+    def get_name(self) -> str:
+        return self._name
+    def get_old(self) -> Optional[Check]:
+        return self._old
+    def get_new(self) -> Optional[Check]:
+        return self._new
+    def get_status(self) -> str:
+        return self._status
+
+    def _compute_status(self) -> str:
+        if self._old is None:
+            return "added"
+        if self._new is None:
+            return "removed"
+        old_value: Optional[bool] = self._old.get_value()
+        new_value: Optional[bool] = self._new.get_value()
+        if old_value == new_value:
+            return "unchanged" if self._old.get_proof() == self._new.get_proof() else "changed"
+        if new_value == False:
+            return "regression"
+        if old_value == False and new_value:
+            return "improvement"
+        return "changed"
+
+    def _items(self, check: Optional[Check]) -> List[ProofItem]:
+        proof: Optional[Proof] = check.get_proof() if check is not None else None
+        return list(proof.get_items()) if proof is not None else []
+
+    def get_added_items(self) -> List[ProofItem]:
+        old_items: set = set(self._items(self._old))
+        return [item for item in self._items(self._new) if item not in old_items]
+
+    def get_removed_items(self) -> List[ProofItem]:
+        new_items: set = set(self._items(self._new))
+        return [item for item in self._items(self._old) if item not in new_items]
+
+    def to_dict(self) -> dict:
+        return {
+            "domain": self.get_domain(),
+            "check": self.get_name(),
+            "status": self.get_status(),
+            "old_value": self._old.get_value() if self._old is not None else None,
+            "new_value": self._new.get_value() if self._new is not None else None,
+            "added_items": [Proof.item_to_dict(item) for item in self.get_added_items()],
+            "removed_items": [Proof.item_to_dict(item) for item in self.get_removed_items()]
+        }
+
+
+class ReportDiff:
+    def __init__(self, old_checks: List[Check], new_checks: List[Check]):
+        old_index: Dict[Tuple[str, str, int], Check] = {key: check for key, check in self._keys(old_checks)}
+        self._diffs: List[CheckDiff] = []
+        matched: set = set()
+        for key, check in self._keys(new_checks):
+            matched.add(key)
+            self._diffs.append(CheckDiff(key[0], key[1], old_index.get(key), check))
+        for key, check in old_index.items():
+            if key not in matched:
+                self._diffs.append(CheckDiff(key[0], key[1], check, None))
+
+    def _keys(self, checks: List[Check]) -> List[Tuple[Tuple[str, str, int], Check]]:
+        occurrences: Dict[Tuple[str, str], int] = {}
+        keys: List[Tuple[Tuple[str, str, int], Check]] = []
+        for check in checks:
+            criterion: Tuple[str, str] = (check.get_domain(), strip_label(check.get_name()))
+            occurrences[criterion] = occurrences.get(criterion, 0) + 1
+            keys.append(((criterion[0], criterion[1], occurrences[criterion]), check))
+        return keys
+
+    def get_diffs(self) -> List[CheckDiff]:
+        return self._diffs
+
+    def get_by_status(self, status: str) -> List[CheckDiff]:
+        return [diff for diff in self.get_diffs() if diff.get_status() == status]
+
+    def count_statuses(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {status: 0 for status in DIFF_STATUSES}
+        for diff in self.get_diffs():
+            counts[diff.get_status()] += 1
+        return counts
+
+    def has_regressions(self) -> bool:
+        return any(diff.get_status() == "regression" for diff in self.get_diffs())
+
+    def write(self, path: Path, old_ig: dict, new_ig: dict) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "old": old_ig,
+                "new": new_ig,
+                "summary": self.count_statuses(),
+                "checks": [diff.to_dict() for diff in self.get_diffs() if diff.get_status() != "unchanged"]
+            }, f, ensure_ascii=False, indent=2)
+        return path
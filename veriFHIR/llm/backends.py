@@ -0,0 +1,167 @@
+from abc import abstractmethod
+from pathlib import Path
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import openai
+from openai.types.chat import ChatCompletion
+
+from veriFHIR.llm.cache import ResponseCache
+from veriFHIR.llm.clients import ClientRegistry, get_client_registry
+
+
+def request_key(model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> str:
+    return ResponseCache.make_key(model, messages[0]["content"], messages[-1]["content"], response_format, seed)
+
+
+class LLMBackend:
+    def requires_api_key(self) -> bool:
+        return False
+
+    def get_identity(self) -> str:
+        return type(self).__name__
+
+    @abstractmethod
+    def create(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> ChatCompletion:
+        pass
+
+    @abstractmethod
+    async def async_create(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> ChatCompletion:
+        pass
+
+
+class OpenAIBackend(LLMBackend):
+    def __init__(self, api_key: str, base_url: Optional[str] = None, clients: Optional[ClientRegistry] = None):
+        self._api_key: str = api_key
+        self._base_url: Optional[str] = base_url
+        self._clients: Optional[ClientRegistry] = clients
+
+    def get_base_url(self) -> Optional[str]:
+        return self._base_url
+    def get_clients(self) -> ClientRegistry:
+        return self._clients if self._clients is not None else get_client_registry()
+
+    def requires_api_key(self) -> bool:
+        return True
+
+    def get_identity(self) -> str:
+        return f"{type(self).__name__}:{self.get_clients().get_client(self._api_key, self.get_base_url()).base_url}"
+
+    def create(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> ChatCompletion:
+        client = self.get_clients().get_client(self._api_key, self.get_base_url())
+        return client.chat.completions.create(model = model, messages = messages, seed = seed, response_format = response_format) #type: ignore
+
+    async def async_create(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> ChatCompletion:
+        client = self.get_clients().get_async_client(self._api_key, self.get_base_url())
+        return await client.chat.completions.create(model = model, messages = messages, seed = seed, response_format = response_format) #type: ignore
+
+
+class LocalBackend(OpenAIBackend):
+    def __init__(self, base_url: str, api_key: Optional[str] = None, clients: Optional[ClientRegistry] = None):
+        super().__init__(api_key or "local", base_url, clients)
+
+    def requires_api_key(self) -> bool:
+        return False
+
+
+class ReplayBackend(LLMBackend):
+    def __init__(self, recording: Path, latency: float = 0, jitter: float = 0):
+        self._recording: Path = recording
+        self._latency: float = latency
+        self._jitter: float = jitter
+        self._responses: Dict[str, dict] = {}
+        with open(recording, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry: dict = json.loads(line)
+                    self._responses[entry["key"]] = entry
+
+    def get_recording(self) -> Path:
+        return self._recording
+    def get_latency(self) -> float:
+        return self._latency
+    def get_jitter(self) -> float:
+        return self._jitter
+
+    def get_identity(self) -> str:
+        return f"{type(self).__name__}:{self.get_recording()}"
+
+    def _get_delay(self, key: str) -> float:
+        if not self.get_jitter():
+            return self.get_latency()
+        return max(0.0, self.get_latency() + random.Random(key).uniform(-self.get_jitter(), self.get_jitter()))
+
+    def _get_response(self, key: str, model: str) -> ChatCompletion:
+        entry: Optional[dict] = self._responses.get(key)
+        if entry is None:
+            raise openai.OpenAIError(f"No recorded response for request {key[:16]} in {self.get_recording()}")
+        return ChatCompletion.model_validate({
+            "id": f"replay-{key[:16]}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": model,
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": entry["content"]}}],
+            "usage": entry.get("usage")
+        })
+
+    def create(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> ChatCompletion:
+        key: str = request_key(model, messages, seed, response_format)
+        time.sleep(self._get_delay(key))
+        return self._get_response(key, model)
+
+    async def async_create(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> ChatCompletion:
+        key: str = request_key(model, messages, seed, response_format)
+        await asyncio.sleep(self._get_delay(key))
+        return self._get_response(key, model)
+
+
+class RecordingBackend(LLMBackend):
+    def __init__(self, backend: LLMBackend, recording: Path):
+        self._backend: LLMBackend = backend
+        self._recording: Path = recording
+        self._lock: threading.Lock = threading.Lock()
+        recording.parent.mkdir(parents=True, exist_ok=True)
+
+    def get_backend(self) -> LLMBackend:
+        return self._backend
+    def get_recording(self) -> Path:
+        return self._recording
+
+    def requires_api_key(self) -> bool:
+        return self.get_backend().requires_api_key()
+
+    def get_identity(self) -> str:
+        return self.get_backend().get_identity()
+
+    def _record(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict], response: ChatCompletion):
+        usage: Optional[dict] = response.usage.model_dump() if response.usage is not None else None
+        entry: dict = {"key": request_key(model, messages, seed, response_format), "model": model, "content": response.choices[0].message.content, "usage": usage}
+        with self._lock:
+            with open(self.get_recording(), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def create(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> ChatCompletion:
+        response: ChatCompletion = self.get_backend().create(model, messages, seed, response_format)
+        self._record(model, messages, seed, response_format, response)
+        return response
+
+    async def async_create(self, model: str, messages: List[dict], seed: Optional[int], response_format: Optional[dict]) -> ChatCompletion:
+        response: ChatCompletion = await self.get_backend().async_create(model, messages, seed, response_format)
+        self._record(model, messages, seed, response_format, response)
+        return response
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def get_backend() -> Optional[LLMBackend]:
+    return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]):
+    global _backend
+    _backend = backend
@@ -0,0 +1,162 @@
+from pathlib import Path
+import hashlib
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from openai import OpenAI
+
+from veriFHIR.llm.backends import LLMBackend, OpenAIBackend, get_backend
+from veriFHIR.llm.cache import ResponseCache
+from veriFHIR.llm.clients import get_client_registry
+from veriFHIR.llm.scheduler import RequestScheduler, get_scheduler
+
+
+MAX_BATCH_REQUESTS: int = 50000
+TERMINAL_STATUSES: Set[str] = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchCollector:
+    def __init__(self):
+        self._lock: threading.Lock = threading.Lock()
+        self._requests: Dict[str, dict] = {}
+        self._failed: Set[str] = set()
+
+    def add(self, key: str, body: dict):
+        with self._lock:
+            if key not in self._failed:
+                self._requests[key] = body
+
+    def get_requests(self) -> Dict[str, dict]:
+        return self._requests
+
+    def mark_failed(self, keys: List[str]):
+        with self._lock:
+            self._failed.update(keys)
+
+    def clear(self):
+        with self._lock:
+            self._requests = {}
+
+
+class OpenAIBatchClient:
+    def __init__(self, api_key: str):
+        self._client: OpenAI = get_client_registry().get_client(api_key).with_options(max_retries = 2)
+
+    def get_client(self) -> OpenAI:
+        return self._client
+
+    def submit(self, input_path: Path) -> str:
+        with open(input_path, "rb") as f:
+            input_file = self.get_client().files.create(file = f, purpose = "batch")
+        batch = self.get_client().batches.create(input_file_id = input_file.id, endpoint = "/v1/chat/completions", completion_window = "24h")
+        return batch.id
+
+    def poll(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        batch = self.get_client().batches.retrieve(batch_id)
+        if batch.status != "completed" or batch.output_file_id is None:
+            return batch.status, None
+        return batch.status, self.get_client().files.content(batch.output_file_id).text
+
+
+class LocalBatchClient:
+    def __init__(self, api_key: str, backend: Optional[LLMBackend] = None, scheduler: Optional[RequestScheduler] = None):
+        self._backend: LLMBackend = backend or get_backend() or OpenAIBackend(api_key)
+        self._scheduler: RequestScheduler = scheduler if scheduler is not None else get_scheduler()
+        self._outputs: Dict[str, str] = {}
+
+    def get_backend(self) -> LLMBackend:
+        return self._backend
+    def get_scheduler(self) -> RequestScheduler:
+        return self._scheduler
+
+    def submit(self, input_path: Path) -> str:
+        lines: List[str] = []
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line in f:
+                request: dict = json.loads(line)
+                body: dict = request["body"]
+                response = self.get_scheduler().call(lambda: self.get_backend().create(body["model"], body["messages"], body.get("seed"), body.get("response_format")),
+                                                     RequestScheduler.estimate_tokens(body["messages"]))
+                if response is None:
+                    lines.append(json.dumps({"custom_id": request["custom_id"], "response": None, "error": {"message": "Request failed"}}))
+                else:
+                    lines.append(json.dumps({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": response.model_dump()}, "error": None}))
+        batch_id: str = f"local_{input_path.stem}"
+        self._outputs[batch_id] = "\n".join(lines)
+        return batch_id
+
+    def poll(self, batch_id: str) -> Tuple[str, Optional[str]]:
+        if batch_id not in self._outputs:
+            return "expired", None
+        return "completed", self._outputs[batch_id]
+
+
+class BatchRunner:
+    def __init__(self, client, batch_dir: Path, cache: ResponseCache, poll_interval: float = 60):
+        self._client = client
+        self._batch_dir: Path = batch_dir
+        self._cache: ResponseCache = cache
+        self._poll_interval: float = poll_interval
+
+    def get_batch_dir(self) -> Path:
+        return self._batch_dir
+
+    def _write_input(self, requests: List[Tuple[str, dict]]) -> Path:
+        lines: List[str] = [json.dumps({"custom_id": key, "method": "POST", "url": "/v1/chat/completions", "body": body}, sort_keys=True, ensure_ascii=False) for key, body in requests]
+        content: str = "\n".join(lines) + "\n"
+        input_path: Path = Path(self.get_batch_dir(), f"batch_{hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]}.jsonl")
+        if not input_path.exists():
+            input_path.write_text(content, encoding="utf-8")
+        return input_path
+
+    def _wait(self, input_path: Path) -> Optional[str]:
+        state_path: Path = input_path.with_suffix(".state.json")
+        output_path: Path = input_path.with_suffix(".output.jsonl")
+        if output_path.exists():
+            return output_path.read_text(encoding="utf-8")
+        state: dict = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else {}
+        if state.get("status") in TERMINAL_STATUSES - {"completed"}:
+            state = {}
+        if "batch_id" not in state:
+            state = {"batch_id": self._client.submit(input_path), "status": "submitted"}
+            state_path.write_text(json.dumps(state), encoding="utf-8")
+            print(f"Batch {state['batch_id']} submitted ({input_path.name})")
+        while True:
+            status, output = self._client.poll(state["batch_id"])
+            if status != state.get("status"):
+                state["status"] = status
+                state_path.write_text(json.dumps(state), encoding="utf-8")
+            if status in TERMINAL_STATUSES:
+                break
+            time.sleep(self._poll_interval)
+        if output is None:
+            print(f"Batch {state['batch_id']} {status} without output")
+            return None
+        output_path.write_text(output, encoding="utf-8")
+        return output
+
+    def run(self, collector: BatchCollector) -> int:
+        self.get_batch_dir().mkdir(parents=True, exist_ok=True)
+        pending: List[Tuple[str, dict]] = sorted(collector.get_requests().items())
+        answered: int = 0
+        for start in range(0, len(pending), MAX_BATCH_REQUESTS):
+            requests: List[Tuple[str, dict]] = pending[start:start + MAX_BATCH_REQUESTS]
+            output: Optional[str] = self._wait(self._write_input(requests))
+            received: Set[str] = set()
+            for line in (output or "").splitlines():
+                if not line.strip():
+                    continue
+                result: dict = json.loads(line)
+                response: Optional[dict] = result.get("response")
+                if not response or response.get("status_code") != 200:
+                    continue
+                content: Optional[str] = response["body"]["choices"][0]["message"]["content"]
+                if content is not None:
+                    self._cache.put(result["custom_id"], content)
+                    received.add(result["custom_id"])
+            collector.mark_failed([key for key, _ in requests if key not in received])
+            answered += len(received)
+        return answered
+
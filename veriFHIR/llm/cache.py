@@ -0,0 +1,119 @@
+from pathlib import Path
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+
+ACCESS_FLUSH_SIZE: int = 256
+
+
+class ResponseCache:
+    def __init__(self, cache_dir: Path, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        self._cache_dir: Path = cache_dir
+        self._ttl: Optional[float] = ttl
+        self._max_size: Optional[int] = max_size
+        self._lock: threading.Lock = threading.Lock()
+        self._hits: int = 0
+        self._misses: int = 0
+        self._accessed: Dict[str, float] = {}
+        self._size: int = 0
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._connection: sqlite3.Connection = sqlite3.connect(str(Path(self._cache_dir, "responses.sqlite3")), check_same_thread=False)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._connection.commit()
+        self.evict()
+
+    def get_cache_dir(self) -> Path:
+        return self._cache_dir
+    def get_hits(self) -> int:
+        return self._hits
+    def get_misses(self) -> int:
+        return self._misses
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str, response_format: Optional[dict], seed: Optional[int], backend: Optional[str] = None) -> str:
+        fields: list = [model, system_prompt, user_prompt, response_format, seed]
+        if backend is not None:
+            fields.append(backend)
+        payload: str = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now: float = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._ttl is not None and row[1] + self._ttl < now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._connection.commit()
+                self._size -= len(row[0])
+                self._accessed.pop(key, None)
+                row = None
+            if row is None:
+                self._misses += 1
+                return None
+            self._accessed[key] = now
+            if len(self._accessed) >= ACCESS_FLUSH_SIZE:
+                self._flush_accessed()
+                self._connection.commit()
+            self._hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        now: float = time.time()
+        with self._lock:
+            previous = self._connection.execute("SELECT LENGTH(response) FROM responses WHERE key = ?", (key,)).fetchone()
+            self._connection.execute("INSERT OR REPLACE INTO responses (key, response, created, accessed) VALUES (?, ?, ?, ?)", (key, response, now, now))
+            self._accessed.pop(key, None)
+            self._size += len(response) - (previous[0] if previous is not None else 0)
+            if self._max_size is not None and self._size > self._max_size:
+                self._evict_size()
+            self._connection.commit()
+
+    def _flush_accessed(self):
+        if self._accessed:
+            self._connection.executemany("UPDATE responses SET accessed = ? WHERE key = ?", [(accessed, key) for key, accessed in self._accessed.items()])
+            self._accessed = {}
+
+    def _evict_size(self):
+        self._flush_accessed()
+        to_free: int = self._size - self._max_size #type: ignore
+        freed: int = 0
+        keys: list = []
+        for key, size in self._connection.execute("SELECT key, LENGTH(response) FROM responses ORDER BY accessed"):
+            if freed >= to_free:
+                break
+            keys.append((key,))
+            freed += size
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", keys)
+        self._size -= freed
+
+    def evict(self):
+        with self._lock:
+            self._flush_accessed()
+            if self._ttl is not None:
+                self._connection.execute("DELETE FROM responses WHERE created < ?", (time.time() - self._ttl,))
+            self._size = self._connection.execute("SELECT COALESCE(SUM(LENGTH(response)), 0) FROM responses").fetchone()[0]
+            if self._max_size is not None and self._size > self._max_size:
+                self._evict_size()
+            self._connection.commit()
+
+    def close(self):
+        self.evict()
+        with self._lock:
+            self._connection.close()
+
+
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    return _response_cache
+
+
+def set_response_cache(cache: Optional[ResponseCache]):
+    global _response_cache
+    _response_cache = cache
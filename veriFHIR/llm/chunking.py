@@ -0,0 +1,73 @@
+from functools import lru_cache
+import math
+from typing import Any, List, Optional
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None #type: ignore[assignment]
+
+
+CHARS_PER_TOKEN: int = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model: Optional[str]) -> Any:
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding("o200k_base")
+    except KeyError:
+        pass
+    except Exception:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str, model: Optional[str] = None) -> int:
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _windows(length: int, size: int, step: int) -> List[int]:
+    starts: List[int] = [0]
+    while starts[-1] + size < length:
+        starts.append(starts[-1] + step)
+    return starts
+
+
+def split_text(text: str, max_tokens: Optional[int], overlap: int = 0, model: Optional[str] = None) -> List[str]:
+    if max_tokens is None:
+        return [text]
+    if max_tokens <= overlap:
+        raise Exception(f"Chunk size ({max_tokens} tokens) must be greater than the overlap ({overlap} tokens).")
+    step: int = max_tokens - overlap
+    encoding = _get_encoding(model)
+    if encoding is None:
+        size: int = max_tokens * CHARS_PER_TOKEN
+        return [text[start:start + size] for start in _windows(len(text), size, step * CHARS_PER_TOKEN)]
+    tokens: List[int] = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return [text]
+    offsets: List[int] = encoding.decode_with_offsets(tokens)[1] + [len(text)]
+    return [text[offsets[start]:offsets[min(start + max_tokens, len(tokens))]] for start in _windows(len(tokens), max_tokens, step)]
+
+
+def pack_texts(texts: List[str], max_tokens: Optional[int], model: Optional[str] = None) -> List[List[str]]:
+    if max_tokens is None:
+        return [texts] if texts else []
+    batches: List[List[str]] = []
+    batch_tokens: int = 0
+    for text in texts:
+        tokens: int = count_tokens(text, model) + 2
+        if not batches or batch_tokens + tokens > max_tokens:
+            batches.append([])
+            batch_tokens = 0
+        batches[-1].append(text)
+        batch_tokens += tokens
+    return batches
@@ -0,0 +1,97 @@
+from importlib.util import find_spec
+from pathlib import Path
+import asyncio
+import threading
+from typing import Any, Coroutine, Dict, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+import httpx
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+
+T = TypeVar("T")
+
+ENV_PATH: Path = Path("veriFHIR", "config", ".env")
+
+_env_lock: threading.Lock = threading.Lock()
+_env_loaded: bool = False
+
+
+def load_environment():
+    global _env_loaded
+    with _env_lock:
+        if not _env_loaded:
+            load_dotenv(dotenv_path=ENV_PATH)
+            _env_loaded = True
+
+
+class ClientRegistry:
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0, http2: bool = False):
+        self._limits: httpx.Limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections, keepalive_expiry=keepalive_expiry)
+        self._http2: bool = http2 and find_spec("h2") is not None
+        if http2 and not self._http2:
+            print("HTTP/2 disabled: the h2 package is not installed")
+        self._lock: threading.Lock = threading.Lock()
+        self._clients: Dict[Tuple[str, Optional[str]], OpenAI] = {}
+        self._async_clients: Dict[Tuple[str, Optional[str]], AsyncOpenAI] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def get_limits(self) -> httpx.Limits:
+        return self._limits
+    def is_http2(self) -> bool:
+        return self._http2
+
+    def get_client(self, api_key: str, base_url: Optional[str] = None) -> OpenAI:
+        with self._lock:
+            if (api_key, base_url) not in self._clients:
+                http_client = DefaultHttpxClient(limits=self.get_limits(), http2=self.is_http2())
+                self._clients[(api_key, base_url)] = OpenAI(api_key = api_key, base_url = base_url, max_retries = 0, http_client = http_client)
+            return self._clients[(api_key, base_url)]
+
+    def get_async_client(self, api_key: str, base_url: Optional[str] = None) -> AsyncOpenAI:
+        with self._lock:
+            if (api_key, base_url) not in self._async_clients:
+                http_client = DefaultAsyncHttpxClient(limits=self.get_limits(), http2=self.is_http2())
+                self._async_clients[(api_key, base_url)] = AsyncOpenAI(api_key = api_key, base_url = base_url, max_retries = 0, http_client = http_client)
+            return self._async_clients[(api_key, base_url)]
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="veriFHIR-llm", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop()).result()
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            async_clients, self._async_clients = self._async_clients, {}
+            loop, self._loop = self._loop, None
+            thread, self._thread = self._thread, None
+        for client in clients.values():
+            client.close()
+        if loop is not None:
+            async def close_async_clients():
+                for client in async_clients.values():
+                    await client.close()
+            asyncio.run_coroutine_threadsafe(close_async_clients(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join() #type: ignore
+            loop.close()
+
+
+_registry: ClientRegistry = ClientRegistry()
+
+
+def get_client_registry() -> ClientRegistry:
+    return _registry
+
+
+def set_client_registry(registry: ClientRegistry):
+    global _registry
+    _registry = registry
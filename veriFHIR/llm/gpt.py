@@ -1,29 +1,122 @@
-from openai import OpenAI
-from typing import Optional
+import asyncio
+from typing import Optional, List, Tuple
+from veriFHIR.llm.cache import ResponseCache, get_response_cache
+from veriFHIR.llm.scheduler import RequestScheduler, get_scheduler
+from veriFHIR.llm.batch import BatchCollector
+from veriFHIR.llm.clients import ClientRegistry, get_client_registry
+from veriFHIR.llm.backends import LLMBackend, OpenAIBackend, get_backend
+
+SEED: int = 123
 
 class GPT:
-    def __init__(self, guidelines_prompt: str, api_key: str, model: str):
-        self._client = OpenAI(api_key = api_key)
+    def __init__(self, guidelines_prompt: str, api_key: str, model: str, concurrency: int = 1, cache: Optional[ResponseCache] = None, scheduler: Optional[RequestScheduler] = None, clients: Optional[ClientRegistry] = None, backend: Optional[LLMBackend] = None):
         self._guidelines_prompt = guidelines_prompt
         self._model = model
-    
-    def get_client(self) -> OpenAI:
-        return self._client
-    
+        self._concurrency = concurrency
+        self._cache = cache if cache is not None else get_response_cache()
+        self._scheduler = scheduler if scheduler is not None else get_scheduler()
+        self._clients = clients if clients is not None else get_client_registry()
+        self._backend = backend or get_backend() or OpenAIBackend(api_key, clients=self._clients)
+        self._batch_collector: Optional[BatchCollector] = None
+
+    def get_clients(self) -> ClientRegistry:
+        return self._clients
+
+    def get_backend(self) -> LLMBackend:
+        return self._backend
+
     def get_guidelines_prompt(self) -> str:
         return self._guidelines_prompt
-    
+
     def get_model(self) -> str:
         return self._model
-        
+
+    def get_concurrency(self) -> int:
+        return self._concurrency
+
+    def get_cache(self) -> Optional[ResponseCache]:
+        return self._cache
+
+    def get_scheduler(self) -> RequestScheduler:
+        return self._scheduler
+
+    def get_batch_collector(self) -> Optional[BatchCollector]:
+        return self._batch_collector
+
+    def set_batch_collector(self, collector: Optional[BatchCollector]):
+        self._batch_collector = collector
+
+    def _cache_key(self, prompt: str, response_format: Optional[dict]) -> str:
+        return ResponseCache.make_key(self.get_model(), self.get_guidelines_prompt(), prompt, response_format, SEED, self.get_backend().get_identity())
+
+    def _cached_response(self, prompt: str, response_format: Optional[dict]) -> Optional[str]:
+        cache: Optional[ResponseCache] = self.get_cache()
+        if cache is None:
+            return None
+        return cache.get(self._cache_key(prompt, response_format))
+
+    def _cache_response(self, prompt: str, response_format: Optional[dict], content: Optional[str]):
+        cache: Optional[ResponseCache] = self.get_cache()
+        if cache is not None and content is not None:
+            cache.put(self._cache_key(prompt, response_format), content)
+
+    def _get_messages(self, prompt: str) -> List[dict]:
+        return [
+            {"role": "system", "content": self.get_guidelines_prompt()},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _collect_request(self, prompt: str, response_format: Optional[dict]):
+        body: dict = {"model": self.get_model(), "messages": self._get_messages(prompt), "seed": SEED}
+        if response_format is not None:
+            body["response_format"] = response_format
+        self.get_batch_collector().add(self._cache_key(prompt, response_format), body) #type: ignore
+
     def openai_chat_completion_response(self, prompt: str, response_format: Optional[dict] = None) -> Optional[str]:
-        response = self.get_client().chat.completions.create(
-            model = self.get_model(),
-            messages = [
-                    {"role": "system", "content": self.get_guidelines_prompt()},
-                    {"role": "user", "content": prompt}
-            ],
-            seed=123,
-            response_format = response_format
-        ) #type: ignore
-        return response.choices[0].message.content
\ No newline at end of file
+        cached: Optional[str] = self._cached_response(prompt, response_format)
+        if cached is not None:
+            return cached
+        if self.get_batch_collector() is not None:
+            self._collect_request(prompt, response_format)
+            return None
+        return self._create_response(prompt, response_format)
+
+    def _create_response(self, prompt: str, response_format: Optional[dict]) -> Optional[str]:
+        messages: List[dict] = self._get_messages(prompt)
+        response = self.get_scheduler().call(lambda: self.get_backend().create(self.get_model(), messages, SEED, response_format), RequestScheduler.estimate_tokens(messages))
+        if response is None:
+            return None
+        content: Optional[str] = response.choices[0].message.content
+        self._cache_response(prompt, response_format, content)
+        return content
+
+    async def async_openai_chat_completion_response(self, prompt: str, response_format: Optional[dict] = None) -> Optional[str]:
+        messages: List[dict] = self._get_messages(prompt)
+        response = await self.get_scheduler().async_call(lambda: self.get_backend().async_create(self.get_model(), messages, SEED, response_format), RequestScheduler.estimate_tokens(messages))
+        if response is None:
+            return None
+        content: Optional[str] = response.choices[0].message.content
+        self._cache_response(prompt, response_format, content)
+        return content
+
+    def openai_chat_completion_responses(self, prompts: List[Tuple[str, Optional[dict]]]) -> List[Optional[str]]:
+        responses: List[Optional[str]] = [self._cached_response(prompt, response_format) for prompt, response_format in prompts]
+        missing: List[int] = [i for i, response in enumerate(responses) if response is None]
+        if self.get_batch_collector() is not None:
+            for i in missing:
+                self._collect_request(*prompts[i])
+            return responses
+        if self.get_concurrency() <= 1 or len(missing) <= 1:
+            for i in missing:
+                responses[i] = self._create_response(*prompts[i])
+            return responses
+        for i, response in zip(missing, self.get_clients().run(self._gather_responses([prompts[i] for i in missing]))):
+            responses[i] = response
+        return responses
+
+    async def _gather_responses(self, prompts: List[Tuple[str, Optional[dict]]]) -> List[Optional[str]]:
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(self.get_concurrency())
+        async def limited(prompt: str, response_format: Optional[dict]) -> Optional[str]:
+            async with semaphore:
+                return await self.async_openai_chat_completion_response(prompt, response_format)
+        return list(await asyncio.gather(*(limited(prompt, response_format) for prompt, response_format in prompts)))
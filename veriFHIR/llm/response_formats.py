@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List, Optional, TypeVar, Type
+from pydantic import BaseModel, create_model
+from typing import Any, Dict, List, Optional, TypeVar, Type
 
 
 T = TypeVar("T", bound="BaseSchemaModel")
@@ -21,4 +21,16 @@ class TextCheckResponse(BaseSchemaModel):
     extract: Optional[str]
 
 class TextCheckResponses(BaseSchemaModel):
-    responses: List[TextCheckResponse]
\ No newline at end of file
+    responses: List[TextCheckResponse]
+
+class AmbiguityResponse(BaseSchemaModel):
+    extract: str
+    reason: str
+
+class AmbiguityResponses(BaseSchemaModel):
+    responses: List[AmbiguityResponse]
+
+
+def get_combined_response_format(name: str, tasks: Dict[str, Any]) -> dict:
+    model: Type[BaseSchemaModel] = create_model("CombinedPageResponse", __base__=BaseSchemaModel, **{task: (schema, ...) for task, schema in tasks.items()}) #type: ignore
+    return model.get_response_format(name)
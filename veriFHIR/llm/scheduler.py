@@ -0,0 +1,252 @@
+from collections import deque
+from email.utils import parsedate_to_datetime
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Deque, List, Optional, Tuple, TypeVar
+
+import openai
+
+
+T = TypeVar("T")
+
+_RETRYABLE_STATUS: set = {408, 409, 429}
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float):
+        self._capacity: float = per_minute
+        self._rate: float = per_minute / 60
+        self._tokens: float = per_minute
+        self._last: float = time.monotonic()
+
+    def _refill(self):
+        now: float = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def reserve(self, amount: float) -> float:
+        self._refill()
+        self._tokens -= min(amount, self._capacity)
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / self._rate
+
+    def adjust(self, amount: float):
+        self._refill()
+        self._tokens = min(self._capacity, self._tokens - amount)
+
+
+class InFlightLimiter:
+    def __init__(self, limit: int):
+        self._limit: int = limit
+        self._count: int = 0
+        self._condition: threading.Condition = threading.Condition()
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    def get_limit(self) -> int:
+        return self._limit
+
+    def acquire(self):
+        with self._condition:
+            while self._count >= self._limit:
+                self._condition.wait()
+            self._count += 1
+
+    async def async_acquire(self):
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self._count < self._limit:
+                    self._count += 1
+                    return
+                future: asyncio.Future = loop.create_future()
+                self._waiters.append((loop, future))
+            await future
+
+    def release(self):
+        with self._condition:
+            self._count -= 1
+            self._condition.notify()
+            self._wake_next()
+
+    def _wake_next(self):
+        while self._waiters:
+            loop, future = self._waiters.popleft()
+            if not future.done():
+                loop.call_soon_threadsafe(self._wake, future)
+                return
+
+    def _wake(self, future: asyncio.Future):
+        if future.done():
+            with self._condition:
+                self._wake_next()
+        else:
+            future.set_result(None)
+
+
+class RequestScheduler:
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 60.0, max_in_flight: Optional[int] = None):
+        self._requests: Optional[TokenBucket] = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens: Optional[TokenBucket] = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._max_retries: int = max_retries
+        self._base_delay: float = base_delay
+        self._max_delay: float = max_delay
+        self._in_flight: Optional[InFlightLimiter] = InFlightLimiter(max_in_flight) if max_in_flight else None
+        self._lock: threading.Lock = threading.Lock()
+        self._request_count: int = 0
+        self._attempt_count: int = 0
+        self._retry_count: int = 0
+        self._failure_count: int = 0
+        self._throttle_wait: float = 0
+        self._retry_wait: float = 0
+
+    def get_max_retries(self) -> int:
+        return self._max_retries
+    def get_request_count(self) -> int:
+        return self._request_count
+    def get_attempt_count(self) -> int:
+        return self._attempt_count
+    def get_retry_count(self) -> int:
+        return self._retry_count
+    def get_failure_count(self) -> int:
+        return self._failure_count
+    def get_throttle_wait(self) -> float:
+        return self._throttle_wait
+    def get_retry_wait(self) -> float:
+        return self._retry_wait
+
+    @staticmethod
+    def estimate_tokens(messages: List[dict]) -> int:
+        return sum(len(str(message.get("content", ""))) // 4 + 4 for message in messages)
+
+    def _count_request(self):
+        with self._lock:
+            self._request_count += 1
+
+    def _acquire(self, tokens: int) -> float:
+        with self._lock:
+            self._attempt_count += 1
+            wait: float = 0
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1))
+            if self._tokens is not None:
+                wait = max(wait, self._tokens.reserve(tokens))
+            self._throttle_wait += wait
+            return wait
+
+    def _record_usage(self, result: Any, estimated: int):
+        usage = getattr(result, "usage", None)
+        total_tokens: Optional[int] = getattr(usage, "total_tokens", None)
+        if self._tokens is not None and total_tokens is not None:
+            with self._lock:
+                self._tokens.adjust(total_tokens - estimated)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        headers = response.headers
+        retry_after_ms: Optional[str] = headers.get("retry-after-ms")
+        if retry_after_ms is not None:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+        retry_after: Optional[str] = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return float(retry_after)
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code in _RETRYABLE_STATUS or error.status_code >= 500
+        return False
+
+    def _retry_delay(self, error: Exception, attempt: int) -> Optional[float]:
+        if attempt >= self.get_max_retries() or not self._is_retryable(error):
+            with self._lock:
+                self._failure_count += 1
+            print(f"LLM request failed: {error}")
+            return None
+        delay: Optional[float] = self._retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self._max_delay, self._base_delay * 2 ** attempt))
+        with self._lock:
+            self._retry_count += 1
+            self._retry_wait += delay
+        return delay
+
+    def call(self, function: Callable[[], T], tokens: int = 0) -> Optional[T]:
+        self._count_request()
+        attempt: int = 0
+        while True:
+            wait: float = self._acquire(tokens)
+            if wait > 0:
+                time.sleep(wait)
+            try:
+                if self._in_flight is not None:
+                    self._in_flight.acquire()
+                try:
+                    result: T = function()
+                finally:
+                    if self._in_flight is not None:
+                        self._in_flight.release()
+            except openai.OpenAIError as error:
+                delay: Optional[float] = self._retry_delay(error, attempt)
+                if delay is None:
+                    return None
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self._record_usage(result, tokens)
+            return result
+
+    async def async_call(self, function: Callable[[], Awaitable[T]], tokens: int = 0) -> Optional[T]:
+        self._count_request()
+        attempt: int = 0
+        while True:
+            wait: float = self._acquire(tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                if self._in_flight is not None:
+                    await self._in_flight.async_acquire()
+                try:
+                    result: T = await function()
+                finally:
+                    if self._in_flight is not None:
+                        self._in_flight.release()
+            except openai.OpenAIError as error:
+                delay: Optional[float] = self._retry_delay(error, attempt)
+                if delay is None:
+                    return None
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self._record_usage(result, tokens)
+            return result
+
+
+_scheduler: RequestScheduler = RequestScheduler()
+
+
+def get_scheduler() -> RequestScheduler:
+    return _scheduler
+
+
+def set_scheduler(scheduler: RequestScheduler):
+    global _scheduler
+    _scheduler = scheduler
@@ -0,0 +1,149 @@
+from __future__ import annotations
+from abc import abstractmethod
+from pathlib import Path, PurePosixPath
+import fnmatch
+import os
+import posixpath
+import tarfile
+import zipfile
+from typing import IO, Dict, List, Optional, Set, Union
+
+
+VirtualPath = Union[str, PurePosixPath]
+
+
+class IGFileSystem:
+    def _key(self, path: VirtualPath) -> str:
+        key: str = posixpath.normpath(str(path).replace("\\", "/")).lstrip("/")
+        if key == ".":
+            return ""
+        return key
+
+    @abstractmethod
+    def exists(self, path: VirtualPath) -> bool:
+        pass
+
+    @abstractmethod
+    def is_file(self, path: VirtualPath) -> bool:
+        pass
+
+    @abstractmethod
+    def open(self, path: VirtualPath) -> IO[bytes]:
+        pass
+
+    @abstractmethod
+    def list_files(self, directory: VirtualPath) -> List[PurePosixPath]:
+        pass
+
+    def read_bytes(self, path: VirtualPath) -> bytes:
+        with self.open(path) as f:
+            return f.read()
+
+    def read_text(self, path: VirtualPath, encoding: str = "utf-8") -> str:
+        return self.read_bytes(path).decode(encoding)
+
+    def glob(self, directory: VirtualPath, pattern: str) -> List[PurePosixPath]:
+        return [file for file in self.list_files(directory) if fnmatch.fnmatchcase(file.name, pattern)]
+
+    def read_tar_member(self, path: VirtualPath, member: str) -> bytes:
+        with self.open(path) as f:
+            with tarfile.open(fileobj=f, mode="r|gz") as tar_ref:
+                for tar_info in tar_ref:
+                    if tar_info.isfile() and posixpath.normpath(tar_info.name) == posixpath.normpath(member):
+                        extracted: Optional[IO[bytes]] = tar_ref.extractfile(tar_info)
+                        if extracted is not None:
+                            return extracted.read()
+        raise Exception(f"{member} not found in {path}.")
+
+    def close(self):
+        pass
+
+
+class DirectoryFileSystem(IGFileSystem):
+    def __init__(self, root: Path):
+        self._root: Path = root
+
+    def get_root(self) -> Path:
+        return self._root
+
+    def _real_path(self, path: VirtualPath) -> Path:
+        return Path(self.get_root(), self._key(path))
+
+    def exists(self, path: VirtualPath) -> bool:
+        return self._real_path(path).exists()
+
+    def is_file(self, path: VirtualPath) -> bool:
+        return self._real_path(path).is_file()
+
+    def open(self, path: VirtualPath) -> IO[bytes]:
+        return open(self._real_path(path), "rb")
+
+    def list_files(self, directory: VirtualPath) -> List[PurePosixPath]:
+        real_directory: Path = self._real_path(directory)
+        if not real_directory.is_dir():
+            return []
+        key: str = self._key(directory)
+        return [PurePosixPath(key, file.name) for file in sorted(real_directory.iterdir()) if file.is_file()]
+
+
+class ZipFileSystem(IGFileSystem):
+    def __init__(self, zip_path: Path):
+        self._zip_path: Path = zip_path
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._zip_pid: Optional[int] = None
+        self._files: Dict[str, str] = {}
+        self._dirs: Set[str] = {""}
+        for name in self._get_zip().namelist():
+            key: str = self._key(name)
+            if name.endswith("/"):
+                self._dirs.add(key)
+            else:
+                self._files[key] = name
+            parent: str = posixpath.dirname(key)
+            while parent and parent not in self._dirs:
+                self._dirs.add(parent)
+                parent = posixpath.dirname(parent)
+
+    def __getstate__(self) -> dict:
+        state: dict = self.__dict__.copy()
+        state["_zip"] = None
+        return state
+
+    def get_zip_path(self) -> Path:
+        return self._zip_path
+
+    def _get_zip(self) -> zipfile.ZipFile:
+        if self._zip is None or self._zip_pid != os.getpid():
+            self._zip = zipfile.ZipFile(self.get_zip_path(), "r")
+            self._zip_pid = os.getpid()
+        return self._zip
+
+    def exists(self, path: VirtualPath) -> bool:
+        key: str = self._key(path)
+        return key in self._files or key in self._dirs
+
+    def is_file(self, path: VirtualPath) -> bool:
+        return self._key(path) in self._files
+
+    def open(self, path: VirtualPath) -> IO[bytes]:
+        key: str = self._key(path)
+        if key not in self._files:
+            raise FileNotFoundError(f"{path} not found in {self.get_zip_path()}.")
+        return self._get_zip().open(self._files[key], "r")
+
+    def list_files(self, directory: VirtualPath) -> List[PurePosixPath]:
+        key: str = self._key(directory)
+        return [PurePosixPath(file) for file in sorted(self._files) if posixpath.dirname(file) == key]
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+
+def open_filesystem(path: Path) -> IGFileSystem:
+    if Path(path).is_dir():
+        return DirectoryFileSystem(Path(path))
+    if zipfile.is_zipfile(path):
+        return ZipFileSystem(Path(path))
+    raise Exception(f"{path} is neither a directory nor a ZIP file.")
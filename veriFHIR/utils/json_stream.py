@@ -0,0 +1,77 @@
+import codecs
+import json
+import re
+from typing import IO, Any, Iterator, Tuple
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _StreamReader:
+    def __init__(self, stream: IO[bytes], chunk_size: int):
+        self._stream: IO[bytes] = stream
+        self._chunk_size: int = chunk_size
+        self._decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._json_decoder: json.JSONDecoder = json.JSONDecoder()
+        self._buffer: str = ""
+        self._pos: int = 0
+        self._eof: bool = False
+
+    def _read_more(self, size: int = 0) -> bool:
+        if self._eof:
+            return False
+        data: bytes = self._stream.read(max(self._chunk_size, size))
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+        if not data:
+            self._eof = True
+            self._buffer += self._decoder.decode(b"", final=True)
+        else:
+            self._buffer += self._decoder.decode(data)
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end() #type: ignore
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ""
+
+    def take(self, char: str):
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self._buffer, self._pos)
+        self._pos += 1
+
+    def decode(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._read_more(len(self._buffer) - self._pos):
+                    continue
+                raise
+            truncated: bool = end == len(self._buffer) or (isinstance(value, (int, float)) and self._buffer[end] in ".eE+-")
+            if truncated and self._read_more(len(self._buffer) - self._pos):
+                continue
+            self._pos = end
+            return value
+
+
+def iter_json_items(stream: IO[bytes], chunk_size: int = 65536) -> Iterator[Tuple[str, Any]]:
+    reader: _StreamReader = _StreamReader(stream, chunk_size)
+    if reader.peek() != "{":
+        return
+    reader.take("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.decode()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting property name", "", 0)
+        reader.take(":")
+        yield key, reader.decode()
+        if reader.peek() == "}":
+            return
+        reader.take(",")
@@ -0,0 +1,68 @@
+from collections import deque
+import re
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def normalize_text(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+class MultiPatternMatcher:
+    def __init__(self, patterns: Iterable[str]):
+        self._patterns: List[str] = sorted({pattern for pattern in patterns if pattern})
+        self._automaton = None
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        if ahocorasick is not None and self._patterns:
+            self._automaton = ahocorasick.Automaton()
+            for i, pattern in enumerate(self._patterns):
+                self._automaton.add_word(pattern, i)
+            self._automaton.make_automaton()
+        else:
+            self._build()
+
+    def get_patterns(self) -> List[str]:
+        return self._patterns
+
+    def _build(self):
+        for i, pattern in enumerate(self._patterns):
+            state: int = 0
+            for char in pattern:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    next_state = len(self._goto) - 1
+                    self._goto[state][char] = next_state
+                state = next_state
+            self._out[state].append(i)
+        queue: deque = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail: int = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> List[Tuple[int, str]]:
+        if self._automaton is not None:
+            return [(end - len(self._patterns[i]) + 1, self._patterns[i]) for end, i in self._automaton.iter(text)]
+        matches: List[Tuple[int, str]] = []
+        state: int = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for i in self._out[state]:
+                matches.append((position - len(self._patterns[i]) + 1, self._patterns[i]))
+        return matches
@@ -0,0 +1,23 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+
+def parallel_imap(function: Callable, items: Iterable, workers: Optional[int] = None, processes: bool = False) -> Iterator[Any]:
+    items = list(items)
+    if not workers or workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield function(item)
+        return
+    executor: Executor
+    chunksize: int = 1
+    if processes:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, len(items) // (workers * 4))
+    else:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    with executor:
+        yield from executor.map(function, items, chunksize=chunksize)
+
+
+def parallel_map(function: Callable, items: Iterable, workers: Optional[int] = None, processes: bool = False) -> List[Any]:
+    return list(parallel_imap(function, items, workers, processes))